@@ -93,7 +93,7 @@ sub clean {
 		doit(@$command);
 	}
 	doit('rm', '-rf', '.pybuild/');
-	doit('find', '.', '-name', '*.pyc', '-exec', 'rm', '{}', ';');
+	doit('find', '.', '-name', '*.pyc', '-delete');
 }
 
 sub pybuild_commands {
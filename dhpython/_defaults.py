@@ -23,7 +23,6 @@ import logging
 from configparser import ConfigParser
 from os import environ
 from os.path import exists
-from subprocess import Popen, PIPE
 
 SUPPORTED = {
     'cpython3': [(3, 8)],
@@ -66,12 +65,9 @@ def cpython_versions(major):
 def from_file(fpath):
     if not exists(fpath):
         raise ValueError("missing interpreter: %s" % fpath)
-    command = "{} --version".format(fpath)
-    with Popen(command, shell=True, stdout=PIPE) as process:
-        stdout, _ = process.communicate()
-        stdout = str(stdout, 'utf-8')
-
-    print(stdout)
+    # pylint: disable=import-outside-toplevel
+    from dhpython.supervisor import run
+    print(run((fpath, '--version'))['stdout'])
 
 
 cpython3 = cpython_versions(3)
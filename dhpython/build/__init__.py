@@ -19,6 +19,7 @@
 # THE SOFTWARE.
 
 import logging
+from collections.abc import Mapping
 from glob import glob1
 from os.path import dirname
 
@@ -26,17 +27,54 @@ from dhpython.exceptions import RequiredCommandMissingException
 
 log = logging.getLogger('dhpython')
 
-plugins = {}
-for i in sorted(i[7:-3] for i in glob1(dirname(__file__), 'plugin_*.py')):
-    try:
-        module = __import__("dhpython.build.plugin_%s" % i, fromlist=[i])
-        module.BuildSystem.NAME = i
-        module.BuildSystem.is_usable()
-        plugins[i] = module.BuildSystem
-    except RequiredCommandMissingException as err:
-        log.debug("cannot initialize '%s' plugin: Missing command '%s'", i, err)
-    except Exception as err:
-        if log.level < logging.INFO:
-            log.debug("cannot initialize '%s' plugin", i, exc_info=True)
-        else:
-            log.debug("cannot initialize '%s' plugin: %s", i, err)
+
+class Plugins(Mapping):
+    """Build system plugins, imported on first access.
+
+    Only names are known upfront (from plugin_*.py file names), a plugin
+    module is imported (and its required commands checked) when it's
+    selected or, while iterating, when all plugins have to detect().
+    Plugins that cannot be initialized are not in the mapping.
+    """
+
+    def __init__(self, names):
+        self._names = names
+        self._loaded = {}
+        self._commands = {}
+
+    def _load(self, name):
+        if name not in self._loaded:
+            self._loaded[name] = None
+            try:
+                module = __import__('dhpython.build.plugin_%s' % name, fromlist=[name])
+                module.BuildSystem.NAME = name
+                self._commands[name] = module.BuildSystem.REQUIRED_COMMANDS
+                module.BuildSystem.is_usable()
+                self._loaded[name] = module.BuildSystem
+            except RequiredCommandMissingException as err:
+                log.debug("cannot initialize '%s' plugin: Missing command '%s'", name, err)
+            except Exception as err:
+                if log.level < logging.INFO:
+                    log.debug("cannot initialize '%s' plugin", name, exc_info=True)
+                else:
+                    log.debug("cannot initialize '%s' plugin: %s", name, err)
+        return self._loaded[name]
+
+    def __getitem__(self, name):
+        plugin = self._load(name) if name in self._names else None
+        if plugin is None:
+            raise KeyError(name)
+        return plugin
+
+    def __iter__(self):
+        return (name for name in self._names if self._load(name) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def required_commands(self):
+        """Return commands required by plugins imported so far"""
+        return sorted({i for commands in self._commands.values() for i in commands})
+
+
+plugins = Plugins(sorted(i[7:-3] for i in glob1(dirname(__file__), 'plugin_*.py')))
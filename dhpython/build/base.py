@@ -18,19 +18,120 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import fnmatch
 import logging
+import re
 from functools import wraps
-from glob import glob1
-from os import remove, walk
-from os.path import exists, isdir, join
+from hashlib import sha256
+from glob import glob, glob1
+from os import link, remove, scandir
+from os.path import abspath, basename, dirname, exists, isdir, join
 from pathlib import Path
 from shlex import quote
-from shutil import rmtree, copyfile, copytree, which
-from dhpython.debhelper import DebHelper, build_options
+from shutil import rmtree, copy2, copyfile, copytree, which
 from dhpython.exceptions import RequiredCommandMissingException
-from dhpython.tools import execute
+from dhpython.tools import LOG_SUFFIXES, dpkg_architecture, execute, memoize
 
 log = logging.getLogger('dhpython')
+# lines of failed command's output included in the exception
+TAIL_LINES = 20
+# runs unittest and pytest (without xdist) suites in several processes
+TEST_RUNNER = quote(join(dirname(abspath(__file__)), 'testrunner.py'))
+# pytest arguments that already set the number of xdist workers
+PYTEST_JOBS_RE = re.compile(r'(?:^|\s)(?:-n\s*\S|--numprocesses\b)')
+# directories without bytecode of the package, not scanned by clean_tree
+SKIP_DIRS = {'.pybuild', '.git', '.hg', '.svn', '.bzr'}
+WHEEL_NAME_RE = re.compile(r'''
+    ^(?P<name>[^-]+)-(?P<version>[^-]+)(?:-(?P<build>\d[^-]*))?
+    -(?P<python>[^-]+)-(?P<abi>[^-]+)-(?P<platform>[^-]+)\.whl$''', re.VERBOSE)
+
+
+def version_independent_wheel(fname):
+    """Check if wheel can be installed in all Python 3 versions.
+
+    :return: None if it cannot, minimum required Python version otherwise,
+        ((3,) if wheel works with all Python 3 versions)
+
+    >>> version_independent_wheel('foo-1.0-py3-none-any.whl')
+    (3,)
+    >>> version_independent_wheel('foo-1.0-cp311-abi3-linux_x86_64.whl')
+    (3, 11)
+    >>> version_independent_wheel('foo-1.0-cp311-cp311-linux_x86_64.whl')
+    """
+    match = WHEEL_NAME_RE.match(basename(fname))
+    if not match:
+        return None
+    python_tags = match.group('python').split('.')
+    if match.group('abi') == 'none' and match.group('platform') == 'any':
+        if all(tag in ('py3', 'py2') for tag in python_tags) and 'py3' in python_tags:
+            return (3,)
+    elif match.group('abi') == 'abi3' and len(python_tags) == 1:
+        tag = python_tags[0]
+        if tag.startswith('cp3') and tag[3:].isdigit():
+            return (3, int(tag[3:]))
+    return None
+
+
+@memoize
+def tox_major_version():
+    """Return major version of installed tox (invoked once per pybuild run)"""
+    r = execute(['tox', '--version', '--quiet'], shell=False)
+    try:
+        return int(r['stdout'].split('.', 1)[0])
+    except ValueError as err:
+        raise Exception(f"tox was installed but broken: stdout='{r['stdout']}', stderr='{r['stderr']}'") from err
+
+
+@memoize
+def has_module(interpreter, name):
+    """Check if interpreter can import given module (invoked once per interpreter)"""
+    r = execute([interpreter, '-c', 'import {}'.format(name)], shell=False)
+    return r['returncode'] == 0
+
+
+def tox_workdir(args, config):
+    """Return tox's work directory for given interpreter and config file
+
+    It's kept in .pybuild/tox/ (next to version's home_dir) or in
+    $AUTOPKGTEST_TMP/tox/ (home_dir of all versions in autopkgtests).
+    """
+    base_dir = args['home_dir'] if args['autopkgtest'] else dirname(args['home_dir'])
+    digest = sha256(config.encode('utf-8', 'surrogateescape'))
+    try:
+        with open(config, 'rb') as fp:
+            digest.update(fp.read())
+    except OSError:
+        pass
+    return join(base_dir, 'tox', '{}-{}'.format(args['interpreter'],
+                                                digest.hexdigest()[:16]))
+
+
+def setuptools_build_dirs(args, *, copy_egg_info=True):
+    """Return .pydistutils.cfg options that keep setuptools' build files
+    (build/ and *.egg-info) in home_dir instead of the source tree.
+
+    Versions built at the same time would overwrite each other's files
+    otherwise.
+
+    :param copy_egg_info: copy egg-info directories left in the source tree
+        by the clean step (their SOURCES.txt is used instead of the VCS)
+    """
+    for pattern in ('*.egg-info', 'src/*.egg-info') if copy_egg_info else ():
+        for path in glob(join(args['dir'], pattern)):
+            dst = join(args['home_dir'], basename(path))
+            if isdir(path) and not exists(dst):
+                copytree(path, dst)
+    return {'build': {'build_base': join(args['home_dir'], 'build_base')},
+            'egg_info': {'egg_base': args['home_dir']}}
+
+
+def link_or_copy(src, dst):
+    """Hard link src to dst, copy it if hard links are not possible"""
+    try:
+        link(src, dst)
+    except OSError:
+        copy2(src, dst)
+    return dst
 
 
 def copy_test_files(dest='{build_dir}',
@@ -80,6 +181,56 @@ def copy_test_files(dest='{build_dir}',
     return _copy_test_files
 
 
+def clean_tree(path, keep_sources_txt=False):
+    """Remove bytecode and egg-info directories from the source tree.
+
+    The tree is scanned once, version control and pybuild directories
+    are skipped.
+
+    :param keep_sources_txt: remove files from egg-info directories
+        instead of whole directories, but keep SOURCES.txt
+    """
+    todo = [path]
+    while todo:
+        dpath = todo.pop()
+        try:
+            with scandir(dpath) as it:
+                entries = list(it)
+        except OSError as err:
+            log.debug('cannot scan %s: %s', dpath, err)
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in SKIP_DIRS:
+                    continue
+                if entry.name == '__pycache__' or (
+                        not keep_sources_txt and entry.name.endswith('.egg-info')):
+                    log.debug('removing dir: %s', entry.path)
+                    try:
+                        rmtree(entry.path)
+                    except Exception:
+                        log.debug('cannot remove %s', entry.path)
+                elif entry.name.endswith('.egg-info'):
+                    with scandir(entry.path) as it:
+                        items = list(it)
+                    for item in items:
+                        if item.name != 'SOURCES.txt' and \
+                                not item.is_dir(follow_symlinks=False):
+                            log.debug('removing: %s', item.path)
+                            try:
+                                remove(item.path)
+                            except Exception:
+                                log.debug('cannot remove %s', item.path)
+                else:
+                    todo.append(entry.path)
+            elif entry.name.endswith(('.pyc', '.pyo')):
+                log.debug('removing: %s', entry.path)
+                try:
+                    remove(entry.path)
+                except Exception:
+                    log.debug('cannot remove %s', entry.path)
+
+
 class Base:
     """Base class for build system plugins
 
@@ -102,9 +253,16 @@ class Base:
                               'python{version}', 'python{version}-dbg'}
     # files and directories to remove during clean step (other than .pyc):
     CLEAN_FILES = {'.pytest_cache', '.coverage'}
+    # plugin uses sysconfig values of interpreters (f.e. include_dir),
+    # pybuild queries them for all versions at the same time
+    USES_INTERPRETER_CONFIG = False
 
     def __init__(self, cfg):
         self.cfg = cfg
+        # version independent wheels built in this pybuild invocation
+        self._shared_wheels = {}
+        self._wheel_cache = None
+        self._wheel_cache_data = {}
 
     def __repr__(self):
         return "BuildSystem(%s)" % self.NAME
@@ -133,7 +291,7 @@ class Base:
         for tpl in self.REQUIRED_FILES:
             found = False
             for ftpl in tpl.split('|'):
-                res = glob1(context['dir'], ftpl)
+                res = self._detect_glob(context, ftpl)
                 if res:
                     found = True
                     self.DETECTED_REQUIRED_FILES.setdefault(tpl, []).extend(res)
@@ -145,7 +303,7 @@ class Base:
 
         self.DETECTED_OPTIONAL_FILES = {}
         for ftpl, score in self.OPTIONAL_FILES.items():
-            res = glob1(context['dir'], ftpl)
+            res = self._detect_glob(context, ftpl)
             if res:
                 result += score
                 self.DETECTED_OPTIONAL_FILES.setdefault(ftpl, []).extend(res)
@@ -153,19 +311,30 @@ class Base:
             return 100
         return result
 
-    def clean(self, context, args):
-        tox_dir = join(args['dir'], '.tox')
-        if isdir(tox_dir):
-            try:
-                rmtree(tox_dir)
-            except Exception:
-                log.debug('cannot remove %s', tox_dir)
-
-        for fn in self.CLEAN_FILES:
+    @staticmethod
+    def _detect_glob(context, pattern):
+        """glob1 in context['dir'], using the listing shared by all plugins
+        (context['files']) if available"""
+        files = context.get('files')
+        if files is None:
+            return glob1(context['dir'], pattern)
+        if not pattern.startswith('.'):
+            files = [i for i in files if not i.startswith('.')]
+        return fnmatch.filter(files, pattern)
+
+    def clean_sources(self, context):
+        """Version independent part of the clean step.
+
+        Invoked once per source directory, before the clean step of all
+        versions.
+        """
+        from dhpython.build import trash
+        from dhpython.debhelper import build_depends
+        for fn in self.CLEAN_FILES | {'.tox'}:
             path = join(context['dir'], fn)
             if isdir(path):
                 try:
-                    rmtree(path)
+                    trash.discard(path)
                 except Exception:
                     log.debug('cannot remove %s', path)
             elif exists(path):
@@ -174,41 +343,29 @@ class Base:
                 except Exception:
                     log.debug('cannot remove %s', path)
 
-        dh = DebHelper(build_options())
         # Plugins that rely on repository contents to build MANIFEST
-        clean_sources_txt = not set(
+        keep_sources_txt = bool(set(
             ('python3-setuptools-scm', 'python3-setuptools-git')
-        ).intersection(set(dh.build_depends))
-
-        for root, dirs, file_names in walk(context['dir']):
-            for name in dirs[:]:
-                if name == '__pycache__' or (
-                        clean_sources_txt and name.endswith('.egg-info')):
-                    dpath = join(root, name)
-                    log.debug('removing dir: %s', dpath)
-                    try:
-                        rmtree(dpath)
-                    except Exception:
-                        log.debug('cannot remove %s', dpath)
-                    else:
-                        dirs.remove(name)
-            for fn in file_names:
-                if fn.endswith(('.pyc', '.pyo')):
-                    fpath = join(root, fn)
-                    log.debug('removing: %s', fpath)
-                    try:
-                        remove(fpath)
-                    except Exception:
-                        log.debug('cannot remove %s', fpath)
-            if root.endswith('.egg-info'):
-                for fn in file_names:
-                    if fn != 'SOURCES.txt':
-                        fpath = join(root, fn)
-                        log.debug('removing: %s', fpath)
-                        try:
-                            remove(fpath)
-                        except Exception:
-                            log.debug('cannot remove %s', fpath)
+        ).intersection(set(build_depends())))
+        # stray bytecode of tools that don't honour PYTHONPYCACHEPREFIX
+        # (and of builds made before it was set)
+        clean_tree(context['dir'], keep_sources_txt)
+
+    def clean(self, context, args):
+        """Version specific part of the clean step, see clean_sources."""
+        # pylint: disable=unused-argument
+        from dhpython.build import trash
+        # bytecode written with PYTHONPYCACHEPREFIX set by pybuild
+        paths = [args.get('pycache_prefix')]
+        # build_dir can be set to a directory outside .pybuild/
+        if args['build_dir'].startswith(args['home_dir'] + '/'):
+            paths.append(args['build_dir'])
+        for path in paths:
+            if path and isdir(path):
+                try:
+                    trash.discard(path)
+                except Exception:
+                    log.debug('cannot remove %s', path)
 
     def configure(self, context, args):
         raise NotImplementedError("configure method not implemented in %s" % self.NAME)
@@ -221,12 +378,40 @@ class Base:
 
     @copy_test_files()
     def test(self, context, args):
+        # tests are split into --test-jobs processes, see TEST_RUNNER
+        args['test_jobs'] = jobs = self.cfg.test_jobs
+        args['test_runner'] = TEST_RUNNER
+        fail_fast = self.cfg.test_fail_fast
         if self.cfg.test_nose2:
-            return 'cd {build_dir}; {interpreter} -m nose2 -v {args}'
+            args['test_options'] = ' --fail-fast' if fail_fast else ''
+            if jobs > 1:
+                return ('cd {build_dir}; {interpreter} -m nose2 -v{test_options}'
+                        ' --plugin nose2.plugins.mp -N {test_jobs} {args}')
+            return 'cd {build_dir}; {interpreter} -m nose2 -v{test_options} {args}'
         elif self.cfg.test_nose:
-            return 'cd {build_dir}; {interpreter} -m nose -v {args}'
+            args['test_options'] = ' --stop' if fail_fast else ''
+            if jobs > 1:
+                return ('cd {build_dir}; {interpreter} -m nose -v{test_options}'
+                        ' --processes={test_jobs} {args}')
+            return 'cd {build_dir}; {interpreter} -m nose -v{test_options} {args}'
         elif self.cfg.test_pytest:
-            return 'cd {build_dir}; {interpreter} -m pytest {args}'
+            # tests that failed with other versions were added to pytest's
+            # cache (see FailedTests), run them before the rest of the suite
+            # pylint: disable=import-outside-toplevel
+            from dhpython.build.failures import cache_option
+            args['test_options'] = ''.join((
+                cache_option(args['build_dir']) if 'failed_tests' in args else '',
+                ' --failed-first' if args.get('failed_tests') else '',
+                ' --exitfirst' if fail_fast else ''))
+            if jobs > 1 and not PYTEST_JOBS_RE.search(args['args']):
+                if 'no:xdist' not in args['args'] and \
+                        has_module(str(args['interpreter']), 'xdist'):
+                    return ('cd {build_dir}; {interpreter} -m pytest'
+                            ' -n {test_jobs}{test_options} {args}')
+                # one file is never split between processes
+                return ('cd {build_dir}; {interpreter} {test_runner}'
+                        ' --jobs {test_jobs} pytest{test_options} {args}')
+            return 'cd {build_dir}; {interpreter} -m pytest{test_options} {args}'
         elif self.cfg.test_tox:
             tox_config = None
             if exists(join(args['dir'], 'tox.ini')):
@@ -239,9 +424,14 @@ class Base:
                 raise Exception("tox config not found. "
                     "Expected to find tox.ini, pyproject.toml, or setup.cfg")
 
+            # environments are reused by later test runs until the config
+            # changes
+            args['tox_work_dir'] = tox_workdir(args, tox_config.format(**args))
+
             tox_cmd = ['cd {build_dir};',
                    'tox',
                    '-c', tox_config,
+                   '--workdir', '{tox_work_dir}',
                    '--sitepackages',
                    '-e', 'py{version.major}{version.minor}',
                    '-x', 'testenv.passenv+=_PYTHON_HOST_PLATFORM',
@@ -251,11 +441,7 @@ class Base:
 
             # --installpkg was added in tox 4. Keep tox 3 support for now,
             # for backportability
-            r = execute(['tox', '--version', '--quiet'], shell=False)
-            try:
-                major_version = int(r['stdout'].split('.', 1)[0])
-            except ValueError as err:
-                raise Exception(f"tox was installed but broken: stdout='{r['stdout']}', stderr='{r['stderr']}'") from err
+            major_version = tox_major_version()
             if major_version < 4:
                 # tox will call pip to install the module. Let it install the
                 # module inside the virtualenv
@@ -278,6 +464,8 @@ class Base:
                 'cd {build_dir};'
                 'stestr --config {dir}/.stestr.conf init;'
                 'PYTHON=python{version} stestr --config {dir}/.stestr.conf run'
+                # stestr runs one worker per CPU by default
+                + (' --concurrency {test_jobs}' if jobs > 1 else '')
             )
         elif self.cfg.test_custom:
             return 'cd {build_dir}; {args}'
@@ -285,7 +473,12 @@ class Base:
             # Temporary: Until Python 3.12 is established, and packages without
             # test suites have explicitly disabled tests.
             args['ignore_no_tests'] = True
-            return 'cd {build_dir}; {interpreter} -m unittest discover -v {args}'
+            args['test_options'] = ' --failfast' if fail_fast else ''
+            if jobs > 1:
+                return ('cd {build_dir}; {interpreter} {test_runner} --jobs'
+                        ' {test_jobs} unittest discover -v{test_options} {args}')
+            return ('cd {build_dir}; {interpreter} -m unittest discover'
+                    ' -v{test_options} {args}')
 
     def build_wheel(self, context, args):
         raise NotImplementedError("build_wheel method not implemented in %s" % self.NAME)
@@ -301,6 +494,117 @@ class Base:
             return str(wheels[0])
         return None
 
+    def _shared_wheel_key(self, args):
+        ipreter = args['interpreter']
+        return args['dir'], ipreter.impl, ipreter.debug
+
+    def register_built_wheel(self, context, args):
+        """Remember wheel built in home_dir if other versions can use it"""
+        if not self.cfg.reuse_wheel:
+            return
+        wheel = self.built_wheel(context, args)
+        if not wheel:
+            return
+        min_version = version_independent_wheel(wheel)
+        if min_version is None:
+            return
+        log.debug('%s is Python version independent, reusing it for other '
+                  'versions', basename(wheel))
+        self._shared_wheels.setdefault(self._shared_wheel_key(args),
+                                       (wheel, min_version))
+
+    def reuse_built_wheel(self, args):
+        """Copy compatible wheel built for another version to home_dir
+
+        :return: True if wheel was copied, False if it has to be built
+        """
+        if not self.cfg.reuse_wheel:
+            return False
+        wheel, min_version = self._shared_wheels.get(
+            self._shared_wheel_key(args), (None, None))
+        version = args['version']
+        if not wheel or not exists(wheel) or \
+                (version.major, version.minor or 0) < min_version:
+            return False
+        dst = join(args['home_dir'], basename(wheel))
+        if dst == wheel:
+            return False
+        log.info('reusing %s built for another Python version', basename(wheel))
+        if not exists(dst):
+            link_or_copy(wheel, dst)
+        return True
+
+    def _wheel_cache_settings(self, context, args):
+        """Return plugin specific data that influence the content of a wheel"""
+        # pylint: disable=unused-argument
+        return None
+
+    def wheel_cache(self, context):
+        """Return WheelCache if enabled via PYBUILD_CACHE_DIR or None"""
+        from dhpython.build import cache
+        path = context['ENV'].get('PYBUILD_CACHE_DIR')
+        if not path:
+            return None
+        if self._wheel_cache is None:
+            size = context['ENV'].get('PYBUILD_CACHE_SIZE')
+            self._wheel_cache = cache.WheelCache(
+                path, cache.parse_size(size) if size else cache.DEFAULT_SIZE)
+        return self._wheel_cache
+
+    def wheel_cache_key(self, context, args):
+        from dhpython.build import cache
+        from dhpython.build.journal import tree_hash
+        from dhpython.debhelper import build_depends
+        data = self._wheel_cache_data
+        if args['dir'] not in data:
+            data[args['dir']] = tree_hash(args['dir'], content=True)
+        if 'build_deps' not in data:
+            data['build_deps'] = cache.build_deps_versions(build_depends())
+        ipreter = args['interpreter']
+        return cache.WheelCache.key({
+            'source': data[args['dir']],
+            'build_deps': data['build_deps'],
+            'plugin': self.NAME,
+            'settings': self._wheel_cache_settings(context, args),
+            'args': args['args'],
+            'interpreter': str(ipreter),
+            'version': str(args['version']),
+            'soabi': ipreter.soabi(args['version']),
+            'arch': dpkg_architecture().get('DEB_HOST_MULTIARCH'),
+            'env': {k: context['ENV'].get(k) for k in cache.KEY_ENV},
+        })
+
+    def get_cached_wheel(self, context, args):
+        """Copy wheel from PYBUILD_CACHE_DIR to home_dir
+
+        :return: True on cache hit
+        """
+        wheel_cache = self.wheel_cache(context)
+        if not wheel_cache:
+            return False
+        try:
+            key = self.wheel_cache_key(context, args)
+        except Exception as err:
+            log.warning('cannot use wheel cache: %s', err)
+            return False
+        wheel = wheel_cache.get(key, args['home_dir'])
+        if wheel:
+            log.info('using %s from %s', basename(wheel), wheel_cache.path)
+            return True
+        log.debug('wheel cache miss (key=%s)', key)
+        return False
+
+    def cache_built_wheel(self, context, args):
+        """Store wheel built in home_dir in PYBUILD_CACHE_DIR"""
+        wheel_cache = self.wheel_cache(context)
+        wheel = self.built_wheel(context, args)
+        if not wheel_cache or not wheel:
+            return
+        try:
+            wheel_cache.put(self.wheel_cache_key(context, args), wheel)
+        except Exception as err:
+            log.warning('cannot store %s in wheel cache: %s', basename(wheel), err)
+
     def execute(self, context, args, command, log_file=None):
         if log_file is False and self.cfg.really_quiet:
             log_file = None
@@ -309,7 +613,36 @@ class Base:
         if 'ENV' in args:
             env.update(args['ENV'])
         log.info(command)
-        return execute(command, context['dir'], env, log_file)
+        timeline = context.get('timeline')
+        if timeline is None:
+            return self._execute(context, command, env, log_file)
+        with timeline.command(command) as result:
+            output = self._execute(context, command, env, log_file)
+            result.update(returncode=output['returncode'],
+                          resources=output.get('resources'))
+        return output
+
+    def _execute(self, context, command, env, log_file):
+        # let make, ninja etc. share make's jobserver (see MAKEFLAGS)
+        from dhpython.build.jobserver import pass_fds
+        if self.cfg.worker:
+            from dhpython.build import worker
+            output = worker.execute(command, context['dir'], env, log_file,
+                                    preload=self.worker_preload(context),
+                                    pass_fds=pass_fds())
+            if output is not None:
+                return output
+        return execute(command, context['dir'], env, log_file,
+                       pass_fds=pass_fds())
+
+    def compile_jobs(self, context):
+        """Return number of compile jobs for current step (see --compile-jobs)"""
+        return context.get('compile_jobs', self.cfg.compile_jobs)
+
+    def worker_preload(self, context):
+        """Return modules imported by the build worker (see --worker)"""
+        # pylint: disable=unused-argument
+        return ()
 
     def print_args(self, context, args):
         # pylint: disable=unused-argument
@@ -345,7 +678,8 @@ def shell_command(func):
             return command
 
         if self.cfg.quiet:
-            log_file = join(args['home_dir'], '{}_cmd.log'.format(func.__name__))
+            log_file = join(args['home_dir'], '{}_cmd.log{}'.format(
+                func.__name__, LOG_SUFFIXES[self.cfg.log_compression]))
         else:
             log_file = False
 
@@ -360,6 +694,9 @@ def shell_command(func):
             pass
         elif output['returncode'] != 0:
             msg = 'exit code={}: {}'.format(output['returncode'], command)
+            if output.get('tail'):
+                lines = output['tail'].rstrip('\n').split('\n')[-TAIL_LINES:]
+                msg += '\nlast lines of its output:\n{}'.format('\n'.join(lines))
             if log_file:
                 msg += '\nfull command log is available in {}'.format(log_file)
             raise Exception(msg)
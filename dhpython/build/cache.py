@@ -0,0 +1,158 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import fcntl
+import json
+import logging
+import os
+import re
+from hashlib import sha256
+from os.path import exists, join
+from shutil import copy2, rmtree
+from tempfile import mkdtemp
+
+log = logging.getLogger('dhpython')
+SIZE_RE = re.compile(r'^(\d+)\s*([KMGT]?)i?B?$', re.IGNORECASE)
+DEFAULT_SIZE = 5 * 1024 ** 3
+# environment variables that can influence the content of a wheel
+KEY_ENV = ('CFLAGS', 'CPPFLAGS', 'CXXFLAGS', 'LDFLAGS', 'DEB_PYTHON_INSTALL_LAYOUT',
+           '_PYTHON_HOST_PLATFORM', '_PYTHON_SYSCONFIGDATA_NAME',
+           'SETUPTOOLS_SCM_PRETEND_VERSION', 'PDM_BUILD_SCM_VERSION',
+           'POETRY_DYNAMIC_VERSIONING_BYPASS', 'PBR_VERSION')
+
+
+def parse_size(value):
+    """Parse size with optional K, M, G or T suffix.
+
+    >>> parse_size('10G')
+    10737418240
+    >>> parse_size('512')
+    512
+    >>> parse_size('2 MiB')
+    2097152
+    """
+    match = SIZE_RE.match(value.strip())
+    if not match:
+        raise ValueError('invalid size: %s' % value)
+    num, unit = match.groups()
+    return int(num) * 1024 ** ' KMGT'.index(unit.upper() or ' ')
+
+
+def build_deps_versions(names):
+    """Return versions of installed packages (f.e. Build-Depends)."""
+    from dhpython.tools import execute
+    names = sorted(names)
+    if not names:
+        return {}
+    res = execute(['dpkg-query', '-W', '-f', '${Package} ${Version}\\n'] + names,
+                  shell=False)
+    result = {}
+    for line in (res['stdout'] or '').splitlines():
+        name, _, version = line.partition(' ')
+        if version:
+            result[name] = version
+    return result
+
+
+class WheelCache:
+    """Content addressed wheel store, shared by many builds.
+
+    Each entry is a directory named after the key that contains one wheel.
+    Entries are created by renaming a temporary directory, so concurrent
+    builders never see incomplete ones. Entry's mtime is updated on every
+    hit, :meth:`evict` removes least recently used entries first.
+    """
+
+    def __init__(self, path, max_size=DEFAULT_SIZE):
+        self.path = path
+        self.max_size = max_size
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def key(data):
+        """Return key for JSON serializable data."""
+        data = json.dumps(data, sort_keys=True, default=str)
+        return sha256(data.encode('utf-8', 'surrogateescape')).hexdigest()
+
+    def get(self, key, dst_dir):
+        """Hardlink (or copy) cached wheel to dst_dir.
+
+        :return: path to the wheel or None if not in the cache
+        """
+        entry = join(self.path, key)
+        try:
+            fnames = [i for i in os.listdir(entry) if i.endswith('.whl')]
+        except FileNotFoundError:
+            return None
+        if len(fnames) != 1:
+            return None
+        src = join(entry, fnames[0])
+        dst = join(dst_dir, fnames[0])
+        try:
+            if exists(dst):
+                os.remove(dst)
+            try:
+                os.link(src, dst)
+            except OSError:
+                copy2(src, dst)
+            os.utime(entry)
+        except FileNotFoundError:
+            # evicted by another builder in the meantime
+            return None
+        return dst
+
+    def put(self, key, wheel):
+        """Store a copy of the wheel in the cache."""
+        entry = join(self.path, key)
+        if exists(entry):
+            return
+        tmp_dir = mkdtemp(prefix='.tmp-', dir=self.path)
+        try:
+            copy2(wheel, join(tmp_dir, os.path.basename(wheel)))
+            os.rename(tmp_dir, entry)
+        except OSError as err:
+            # another builder stored the same wheel first
+            log.debug('cannot store %s in wheel cache: %s', wheel, err)
+            rmtree(tmp_dir, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until cache fits max_size."""
+        with open(join(self.path, '.lock'), 'w', encoding='utf-8') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = []
+            total = 0
+            for entry in os.scandir(self.path):
+                if entry.name.startswith('.') or not entry.is_dir():
+                    continue
+                size = sum(i.stat().st_size for i in os.scandir(entry.path)
+                           if i.is_file())
+                entries.append((entry.stat().st_mtime, size, entry.path))
+                total += size
+            for _, size, path in sorted(entries):
+                if total <= self.max_size:
+                    break
+                log.debug('removing %s from wheel cache', path)
+                # rename first, readers should not see a partial entry
+                tmp_dir = mkdtemp(prefix='.evicted-', dir=self.path)
+                os.rename(path, join(tmp_dir, 'entry'))
+                rmtree(tmp_dir, ignore_errors=True)
+                total -= size
@@ -0,0 +1,127 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Cache of build system detection results (see pybuild --detect, --print).
+
+debhelper invokes `pybuild --detect` before each dh_auto_* command and
+debian/rules files often call `pybuild --print` several times, result is
+stored in .pybuild/ and reused until one of plugins' detect() inputs
+changes: names of files in the source directory, content of the files
+listed below or availability of commands required by plugins.
+"""
+
+import json
+import logging
+import os
+from os.path import abspath, isdir, join
+from shutil import which
+
+from dhpython.build import plugins
+
+log = logging.getLogger('dhpython')
+
+CACHE_FILE = '.pybuild/detect.json'
+# files with content that influences the detection result (relative to
+# the source dir), presence of other files is covered by the listing
+WATCHED_FILES = ('pyproject.toml', 'setup.py', 'setup-3.py', 'setup.cfg',
+                 'PKG-INFO', 'tox.ini', 'CMakeLists.txt', 'meson.build')
+# ... relative to the current dir (see dhpython.debhelper)
+WATCHED_DEBIAN_FILES = ('debian/control',)
+
+
+def scan(dpath):
+    """Return sorted names of files in dpath, shared by plugins' detect()"""
+    try:
+        return sorted(os.listdir(dpath))
+    except OSError:
+        return []
+
+
+def _mtime(fpath):
+    try:
+        return os.stat(fpath).st_mtime_ns
+    except OSError:
+        return None
+
+
+def cache_key(dpath, system):
+    """Return detection inputs that are cheap to check
+
+    Required commands are checked in :func:`load`, they're known only
+    once plugins are imported.
+    """
+    mtimes = {name: _mtime(join(dpath, name)) for name in WATCHED_FILES}
+    mtimes.update((name, _mtime(name)) for name in WATCHED_DEBIAN_FILES)
+    # hidden files are ignored by plugins (see Base._detect_glob)
+    files = [i for i in scan(dpath) if not i.startswith('.')]
+    return {'dir': abspath(dpath), 'system': system, 'files': files,
+            'mtimes': mtimes}
+
+
+def _entry_name(key):
+    return '{}:{}'.format(key['dir'], key['system'] or '')
+
+
+def _load(fpath):
+    try:
+        with open(fpath, encoding='utf-8') as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return {}
+    except Exception as err:
+        log.debug('ignoring broken detection cache %s: %s', fpath, err)
+        return {}
+
+
+def load(key, fpath=CACHE_FILE):
+    """Return cached detection result for given key or None
+
+    :rtype: dict with plugin, certainty and args keys
+    """
+    entry = _load(fpath).get(_entry_name(key))
+    if not entry or entry.pop('key', None) != key:
+        return None
+    # plugins without their required commands are skipped by detection
+    commands = entry.pop('commands', {})
+    if any(bool(which(name)) != found for name, found in commands.items()):
+        return None
+    return entry
+
+
+def save(key, plugin, certainty, args, fpath=CACHE_FILE):
+    """Store detection result, if the .pybuild directory exists already
+
+    It's not created just for the cache, `pybuild --detect` is invoked
+    before the clean step as well.
+    """
+    if not isdir(os.path.dirname(fpath)):
+        return
+    entries = _load(fpath)
+    entries[_entry_name(key)] = {
+        'key': key, 'plugin': plugin, 'certainty': certainty, 'args': args,
+        # required commands of plugins that took part in the detection
+        'commands': {name: bool(which(name)) for name in plugins.required_commands()}}
+    tmp_fpath = '{}.{}.tmp'.format(fpath, os.getpid())
+    try:
+        with open(tmp_fpath, 'w', encoding='utf-8') as fp:
+            json.dump(entries, fp, indent=1, sort_keys=True)
+        os.replace(tmp_fpath, fpath)
+    except OSError as err:
+        log.debug('cannot write detection cache %s: %s', fpath, err)
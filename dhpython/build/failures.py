@@ -0,0 +1,183 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import json
+import logging
+import os
+from os.path import dirname, exists, join, normpath, relpath
+from shlex import quote
+from threading import Lock
+
+log = logging.getLogger('dhpython')
+
+# pytest's cache directory, relative to build_dir (see cache_option)
+CACHE_DIR = '.pytest_cache'
+# pytest's record of tests that failed in the last run (--lf, --ff)
+LASTFAILED = join(CACHE_DIR, 'v', 'cache', 'lastfailed')
+
+
+def cache_option(build_dir):
+    """Return pytest option that keeps its cache in build_dir.
+
+    pytest puts its cache into rootdir, which can be the source directory
+    or tox.ini's directory rather than build_dir.
+    """
+    return ' -o cache_dir={}'.format(quote(join(build_dir, CACHE_DIR)))
+
+
+def last_failed(build_dir):
+    """Return IDs of tests that failed in the last pytest run in build_dir.
+
+    None is returned if pytest's cache doesn't exist (f.e. cacheprovider
+    plugin is disabled).
+    """
+    try:
+        with open(join(build_dir, LASTFAILED), encoding='utf-8') as fp:
+            return sorted(json.load(fp))
+    except FileNotFoundError:
+        return None
+    except Exception as err:
+        log.debug('cannot read pytest cache in %s: %s', build_dir, err)
+        return None
+
+
+def guess_rootdir(build_dir, nodeids):
+    """Return pytest's rootdir relative to build_dir.
+
+    Node IDs are relative to rootdir, it's the closest directory (starting
+    with build_dir) that contains a file from one of them.
+
+    >>> guess_rootdir('/', ['t.py::test'])
+    '.'
+    """
+    for nodeid in nodeids:
+        path = nodeid.split('::', 1)[0]
+        root = build_dir
+        while True:
+            if exists(join(root, path)):
+                return relpath(root, build_dir)
+            parent = dirname(root)
+            if parent == root:
+                break
+            root = parent
+    return '.'
+
+
+def rebase(nodeids, src, dst):
+    """Return node IDs relative to dst directory instead of src.
+
+    >>> rebase(['.pybuild/b/t.py::test', 'tests/t.py'], '/src', '/src/.pybuild/b')
+    ['t.py::test', '../../tests/t.py']
+    >>> rebase(['t.py::test'], '/src/.pybuild/b', '/src')
+    ['.pybuild/b/t.py::test']
+    """
+    if src == dst:
+        return list(nodeids)
+    result = []
+    for nodeid in nodeids:
+        path, sep, rest = nodeid.partition('::')
+        result.append(relpath(join(src, path), dst) + sep + rest)
+    return result
+
+
+class FailedTests:
+    """Record of tests that failed with each Python version.
+
+    Entries are keyed by source directory and version. Tests that failed
+    with other versions are added to pytest's cache of the version that is
+    about to be tested, so that --failed-first runs them before the rest of
+    the suite.
+
+    Node IDs are stored relative to build_dir (with pytest's rootdir next
+    to them), build_dir is a different directory for each version.
+    """
+
+    def __init__(self, fpath):
+        self.fpath = fpath
+        self._lock = Lock()
+
+    def _load(self):
+        try:
+            with open(self.fpath, encoding='utf-8') as fp:
+                return json.load(fp)
+        except FileNotFoundError:
+            return {}
+        except Exception as err:
+            log.warning('ignoring broken record of failed tests %s: %s', self.fpath, err)
+            return {}
+
+    def record(self, dpath, version, build_dir):
+        """Remember tests that failed in the last run in build_dir."""
+        failed = last_failed(build_dir)
+        if failed is None:
+            log.debug('pytest cache not found in %s, failed tests not recorded',
+                      build_dir)
+            return
+        with self._lock:
+            # other pybuild processes (f.e. with different --dir) could have
+            # updated the file in the meantime
+            entries = self._load()
+            versions = entries.setdefault(dpath, {})
+            if failed:
+                rootdir = guess_rootdir(build_dir, failed)
+                versions[str(version)] = {
+                    'rootdir': rootdir,
+                    'tests': rebase(failed, normpath(join(build_dir, rootdir)), build_dir)}
+            else:
+                versions.pop(str(version), None)
+            if not versions:
+                del entries[dpath]
+            try:
+                os.makedirs(dirname(self.fpath), exist_ok=True)
+                tmp_fpath = '{}.{}.tmp'.format(self.fpath, os.getpid())
+                with open(tmp_fpath, 'w', encoding='utf-8') as fp:
+                    json.dump(entries, fp, indent=1, sort_keys=True)
+                os.replace(tmp_fpath, self.fpath)
+            except OSError as err:
+                log.debug('cannot write %s: %s', self.fpath, err)
+
+    def seed(self, dpath, version, build_dir):
+        """Add tests that failed with other versions to pytest's cache.
+
+        :return: IDs of tests that failed with other versions
+        """
+        with self._lock:
+            versions = self._load().get(dpath, {})
+        failed = set()
+        for key, entry in versions.items():
+            if key != str(version):
+                # rootdir of all versions is in the same place, relative
+                # to their build_dir
+                rootdir = normpath(join(build_dir, entry['rootdir']))
+                failed.update(rebase(entry['tests'], build_dir, rootdir))
+        if not failed:
+            return []
+        fpath = join(build_dir, LASTFAILED)
+        cache = dict.fromkeys(last_failed(build_dir) or (), True)
+        cache.update(dict.fromkeys(failed, True))
+        try:
+            os.makedirs(dirname(fpath), exist_ok=True)
+            with open(fpath, 'w', encoding='utf-8') as fp:
+                json.dump(cache, fp, indent=2, sort_keys=True)
+        except OSError as err:
+            log.debug('cannot write %s: %s', fpath, err)
+            return []
+        return sorted(failed)
@@ -0,0 +1,136 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import logging
+import os
+import select
+import stat
+from os import environ
+
+from dhpython.tools import memoize
+
+log = logging.getLogger('dhpython')
+
+
+def parse_makeflags(makeflags):
+    """Return (jobs, jobserver auth) from MAKEFLAGS.
+
+    >>> parse_makeflags('ks -j8 --jobserver-auth=3,4')
+    (8, '3,4')
+    >>> parse_makeflags(' -j4 --jobserver-auth=fifo:/tmp/GMfifo1')
+    (4, 'fifo:/tmp/GMfifo1')
+    >>> parse_makeflags('s --jobserver-fds=5,6 -j')
+    (None, '5,6')
+    >>> parse_makeflags('')
+    (None, None)
+    """
+    jobs = auth = None
+    for flag in makeflags.split():
+        if flag.startswith('-j') and flag[2:].isdigit():
+            jobs = int(flag[2:])
+        elif flag.startswith(('--jobserver-auth=', '--jobserver-fds=')):
+            auth = flag.split('=', 1)[1]
+    return jobs, auth
+
+
+class Jobserver:
+    """GNU make jobserver client.
+
+    Each token read from the jobserver allows to run one more job, it has
+    to be written back once the job is finished. Every process gets one
+    implicit slot for free, it's not represented by a token.
+    """
+
+    def __init__(self, read_fd, write_fd, fds=(), jobs=None):
+        self._read_fd = read_fd
+        self._write_fd = write_fd
+        # file descriptors that children need to access the jobserver
+        self.fds = fds
+        self.jobs = jobs
+
+    @classmethod
+    def from_makeflags(cls, makeflags):
+        """Return Jobserver described in MAKEFLAGS or None"""
+        jobs, auth = parse_makeflags(makeflags)
+        if not auth:
+            return None
+        try:
+            if auth.startswith('fifo:'):
+                fd = os.open(auth[5:], os.O_RDWR | os.O_NONBLOCK)
+                return cls(fd, fd, jobs=jobs)
+            read_fd, write_fd = (int(i) for i in auth.split(','))
+            for fd in (read_fd, write_fd):
+                if not stat.S_ISFIFO(os.fstat(fd).st_mode):
+                    raise ValueError('fd {} is not a pipe'.format(fd))
+            # don't change flags of make's file description, open the pipe
+            # again to get a non-blocking one
+            nb_fd = os.open('/proc/self/fd/{}'.format(read_fd),
+                            os.O_RDONLY | os.O_NONBLOCK)
+        except (OSError, ValueError) as err:
+            # f.e. file descriptors closed by a non-recursive make rule
+            log.debug('jobserver from MAKEFLAGS is not available: %s', err)
+            return None
+        return cls(nb_fd, write_fd, fds=(read_fd, write_fd), jobs=jobs)
+
+    def acquire(self, timeout=None):
+        """Return a token or None if none is available within timeout"""
+        while True:
+            try:
+                token = os.read(self._read_fd, 1)
+            except BlockingIOError:
+                token = None
+            except InterruptedError:
+                continue
+            if token:
+                return token
+            if token == b'':
+                # all writers are gone, make exited
+                return None
+            if timeout == 0:
+                return None
+            ready, _, _ = select.select([self._read_fd], [], [], timeout)
+            if not ready:
+                return None
+
+    def acquire_many(self, count):
+        """Return up to count tokens that are available right now"""
+        tokens = []
+        while len(tokens) < count:
+            token = self.acquire(timeout=0)
+            if token is None:
+                break
+            tokens.append(token)
+        return tokens
+
+    def release(self, *tokens):
+        for token in tokens:
+            os.write(self._write_fd, token)
+
+
+@memoize
+def jobserver():
+    """Return Jobserver from MAKEFLAGS environment variable or None"""
+    return Jobserver.from_makeflags(environ.get('MAKEFLAGS', ''))
+
+
+def pass_fds():
+    """Return file descriptors children need to access the jobserver"""
+    server = jobserver()
+    return server.fds if server else ()
@@ -0,0 +1,184 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import json
+import logging
+import os
+from functools import partial
+from hashlib import sha256
+from os.path import dirname, join, relpath
+from threading import Lock
+from uuid import uuid4
+
+log = logging.getLogger('dhpython')
+
+# steps in the order they're invoked, each one depends on the previous one
+STEPS = ('clean', 'configure', 'build', 'install', 'test')
+# directories and files that are generated during the build
+IGNORED_DIRS = {'.pybuild', '.git', '.hg', '.svn', '.bzr', '.tox',
+                '.pytest_cache', '__pycache__', 'build', 'dist'}
+IGNORED_FILES = ('.pyc', '.pyo', '.so', '.o', '.log', '.substvars')
+# only these directories are scanned in debian/, others are package trees
+DEBIAN_DIRS = {'patches', 'source', 'tests'}
+
+
+def tree_hash(path, content=False):
+    """Return a hash of names, sizes and modification times of source files.
+
+    Build artefacts (see IGNORED_DIRS and IGNORED_FILES) and package
+    directories in debian/ are ignored.
+
+    :param content: hash file contents instead of sizes and modification
+        times (debian/changelog is ignored in this mode, to make the hash
+        stable across binNMUs)
+    """
+    result = sha256()
+    for root, dirs, file_names in os.walk(path):
+        rpath = relpath(root, path)
+        if rpath == 'debian':
+            dirs[:] = [i for i in dirs if i in DEBIAN_DIRS]
+        else:
+            dirs[:] = [i for i in dirs if i not in IGNORED_DIRS
+                       and not i.endswith('.egg-info')]
+        dirs.sort()
+        for fn in sorted(file_names):
+            if fn.endswith(IGNORED_FILES) or fn in ('files', 'debhelper-build-stamp'):
+                continue
+            fpath = join(root, fn)
+            if content:
+                if rpath == 'debian' and fn == 'changelog':
+                    continue
+                result.update(join(rpath, fn).encode('utf-8', 'surrogateescape') + b'\0')
+                try:
+                    if os.path.islink(fpath):
+                        result.update(os.readlink(fpath).encode('utf-8', 'surrogateescape'))
+                    else:
+                        with open(fpath, 'rb') as fp:
+                            for chunk in iter(partial(fp.read, 1 << 20), b''):
+                                result.update(chunk)
+                except OSError:
+                    continue
+                result.update(b'\n')
+                continue
+            try:
+                stat = os.lstat(fpath)
+            except OSError:
+                continue
+            result.update('{}\0{}\0{}\n'.format(
+                join(rpath, fn), stat.st_size, stat.st_mtime_ns).encode('utf-8', 'surrogateescape'))
+    return result.hexdigest()
+
+
+class Journal:
+    """Record of completed steps, used by --resume to skip them.
+
+    Each entry is keyed by step name and version's home directory and holds
+    a fingerprint of step's inputs and a random id regenerated every time
+    the step is invoked. Fingerprint includes the id of the previous step,
+    so re-running f.e. build invalidates install and test as well.
+    """
+
+    def __init__(self, fpath):
+        self.fpath = fpath
+        self._lock = Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.fpath, encoding='utf-8') as fp:
+                return json.load(fp)
+        except FileNotFoundError:
+            return {}
+        except Exception as err:
+            log.warning('ignoring broken pybuild journal %s: %s', self.fpath, err)
+            return {}
+
+    @staticmethod
+    def key(step, home_dir):
+        return '{}:{}'.format(step, home_dir)
+
+    def fingerprint(self, step, home_dir, data):
+        """Return fingerprint of step's inputs.
+
+        :param data: JSON serializable inputs (arguments, environment, ...)
+        """
+        prev = None
+        if step in STEPS and STEPS.index(step):
+            prev_step = STEPS[STEPS.index(step) - 1]
+            with self._lock:
+                prev = self._entries.get(self.key(prev_step, home_dir), {}).get('id')
+        data = json.dumps([step, prev, data], sort_keys=True, default=str)
+        return sha256(data.encode('utf-8', 'surrogateescape')).hexdigest()
+
+    def is_done(self, step, home_dir, fingerprint):
+        with self._lock:
+            entry = self._entries.get(self.key(step, home_dir))
+        return entry is not None and entry['fingerprint'] == fingerprint
+
+    def start(self, step, home_dir):
+        """Forget about previous invocation of the step."""
+        self._update(self.key(step, home_dir), None)
+
+    def done(self, step, home_dir, fingerprint, source_dir=None):
+        """Record completed step.
+
+        :param source_dir: record state of this tree after the step as well,
+            see :meth:`source_hash`
+        """
+        self._update(self.key(step, home_dir),
+                     {'fingerprint': fingerprint, 'id': uuid4().hex})
+        if source_dir is not None:
+            key = self.key('source', source_dir)
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry:
+                self._update(key, dict(entry, after=tree_hash(source_dir)))
+
+    def source_hash(self, source_dir):
+        """Return hash of sources as they were before the first step.
+
+        Steps can write to the source tree (f.e. Cython's .c files), so if
+        nothing changed since the last completed step, the hash recorded
+        before the first one is returned. Otherwise, current hash is
+        recorded as the new starting point.
+        """
+        current = tree_hash(source_dir)
+        key = self.key('source', source_dir)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry['after'] == current:
+            return entry['before']
+        self._update(key, {'before': current, 'after': current})
+        return current
+
+    def _update(self, key, entry):
+        with self._lock:
+            # another pybuild process (f.e. with different --dir) could have
+            # updated the journal in the meantime
+            self._entries = self._load()
+            if entry is None:
+                self._entries.pop(key, None)
+            else:
+                self._entries[key] = entry
+            os.makedirs(dirname(self.fpath), exist_ok=True)
+            tmp_fpath = '{}.{}.tmp'.format(self.fpath, os.getpid())
+            with open(tmp_fpath, 'w', encoding='utf-8') as fp:
+                json.dump(self._entries, fp, indent=1, sort_keys=True)
+            os.replace(tmp_fpath, self.fpath)
@@ -0,0 +1,100 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import json
+import logging
+import os
+from os.path import dirname
+from threading import Lock
+
+log = logging.getLogger('dhpython')
+
+# number of recent builds used to predict memory usage
+HISTORY_SIZE = 5
+
+
+def available():
+    """Return memory available for new processes (in bytes) or None"""
+    try:
+        with open('/proc/meminfo', encoding='ascii') as fp:
+            for line in fp:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def source_name():
+    """Return name of the source package (from debian/changelog)"""
+    try:
+        with open('debian/changelog', encoding='utf-8') as fp:
+            return fp.readline().split(' ', 1)[0] or None
+    except OSError:
+        return None
+
+
+class MemoryHistory:
+    """Peak RSS of recent invocations of each step, per source.
+
+    Values are shared by all versions, the first version built informs
+    the ones started later.
+    """
+
+    def __init__(self, fpath, source):
+        self.fpath = fpath
+        self.source = source
+        self._lock = Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.fpath, encoding='utf-8') as fp:
+                return json.load(fp)
+        except FileNotFoundError:
+            return {}
+        except Exception as err:
+            log.debug('ignoring broken memory history %s: %s', self.fpath, err)
+            return {}
+
+    def predict(self, step):
+        """Return expected peak RSS of the biggest process of step (in bytes)"""
+        with self._lock:
+            values = self._entries.get(self.source, {}).get(step)
+        return max(values) * 1024 if values else 0
+
+    def record(self, step, maxrss):
+        """Remember peak RSS (in KiB, see dhpython.tools.wait) of a step"""
+        if not maxrss:
+            return
+        with self._lock:
+            # other pybuild processes could have updated it in the meantime
+            self._entries = self._load()
+            values = self._entries.setdefault(self.source, {}).setdefault(step, [])
+            values.append(maxrss)
+            del values[:-HISTORY_SIZE]
+            tmp_fpath = '{}.{}.tmp'.format(self.fpath, os.getpid())
+            try:
+                os.makedirs(dirname(self.fpath), exist_ok=True)
+                with open(tmp_fpath, 'w', encoding='utf-8') as fp:
+                    json.dump(self._entries, fp, indent=1, sort_keys=True)
+                os.replace(tmp_fpath, self.fpath)
+            except OSError as err:
+                log.debug('cannot write memory history %s: %s', self.fpath, err)
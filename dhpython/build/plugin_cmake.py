@@ -26,6 +26,7 @@ class BuildSystem(Base):
     REQUIRED_COMMANDS = ['cmake']
     REQUIRED_FILES = ['CMakeLists.txt']
     OPTIONAL_FILES = {'cmake_uninstall.cmake': 10, 'CMakeCache.txt': 10}
+    USES_INTERPRETER_CONFIG = True
 
     @shell_command
     def clean(self, context, args):
@@ -54,7 +55,8 @@ class BuildSystem(Base):
     def build(self, context, args):
         return ('dh_auto_build --buildsystem=cmake'
                 ' --builddirectory={build_dir}'
-                ' -- {args}')
+                ' --max-parallel=%d'
+                ' -- {args}' % self.compile_jobs(context))
 
     @shell_command
     def install(self, context, args):
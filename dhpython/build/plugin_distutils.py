@@ -23,7 +23,8 @@ from glob import glob1
 from os import remove
 from os.path import exists, isdir, join
 from shutil import rmtree, move
-from dhpython.build.base import Base, shell_command, copy_test_files
+from dhpython.build.base import (Base, copy_test_files, setuptools_build_dirs,
+                                 shell_command)
 
 log = logging.getLogger('dhpython')
 _setup_tpl = 'setup.py|setup-3.py'
@@ -40,11 +41,15 @@ def create_pydistutils_cfg(func):
     def wrapped_func(self, context, args, *oargs, **kwargs):
         fpath = join(args['home_dir'], '.pydistutils.cfg')
         if not exists(fpath):
+            dirs = setuptools_build_dirs(args)
             with open(fpath, 'w', encoding='utf-8') as fp:
                 lines = ['[clean]\n',
                          'all=1\n',
                          '[build]\n',
                          'build_lib={}\n'.format(args['build_dir']),
+                         'build_base={}\n'.format(dirs['build']['build_base']),
+                         '[egg_info]\n',
+                         'egg_base={}\n'.format(dirs['egg_info']['egg_base']),
                          '[install]\n',
                          'force=1\n',
                          'install_layout=deb\n',
@@ -79,6 +84,9 @@ class BuildSystem(Base):
             context['args']['setup_py'] = 'setup.py'
         return result
 
+    def worker_preload(self, context):
+        return ('setuptools',)
+
     @shell_command
     @create_pydistutils_cfg
     def clean(self, context, args):
@@ -95,7 +103,8 @@ class BuildSystem(Base):
     @shell_command
     @create_pydistutils_cfg
     def build(self, context, args):
-        return '{interpreter.binary_dv} {setup_py} build {args}'
+        return ('{interpreter.binary_dv} {setup_py} build --parallel=%d {args}'
+                % self.compile_jobs(context))
 
     @shell_command
     def _bdist_wheel(self, context, args):
@@ -108,16 +117,29 @@ class BuildSystem(Base):
         # Don't build a wheel in the deb install layout
         fpath = join(args['home_dir'], '.pydistutils.cfg')
         remove(fpath)
-        return '{interpreter.binary_dv} -c "import setuptools, runpy; runpy.run_path(\'{setup_py}\')" bdist_wheel {args}'
+        # other versions can be built at the same time, see
+        # setuptools_build_dirs
+        dirs = setuptools_build_dirs(args)
+        args['egg_info_dir'] = dirs['egg_info']['egg_base']
+        args['build_base_dir'] = dirs['build']['build_base']
+        return ('{interpreter.binary_dv} -c "import setuptools, runpy; runpy.run_path(\'{setup_py}\')"'
+                ' egg_info --egg-base {egg_info_dir} build --build-base {build_base_dir}'
+                ' bdist_wheel --dist-dir {home_dir}/dist {args}')
 
     def build_wheel(self, context, args):
+        if self.reuse_built_wheel(args) or \
+                self.get_cached_wheel(context, args):
+            self.register_built_wheel(context, args)
+            return
         self._bdist_wheel(context, args)
-        dist_dir = join(args['dir'], 'dist')
+        dist_dir = join(args['home_dir'], 'dist')
         wheels = glob1(dist_dir, '*.whl')
         n_wheels = len(wheels)
         if n_wheels != 1:
             raise Exception(f"Expected 1 wheel, found {n_wheels}")
         move(join(dist_dir, wheels[0]), args['home_dir'])
+        self.cache_built_wheel(context, args)
+        self.register_built_wheel(context, args)
 
     @shell_command
     @create_pydistutils_cfg
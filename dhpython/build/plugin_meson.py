@@ -50,7 +50,8 @@ class BuildSystem(Base):
     def build(self, context, args):
         return ('dh_auto_build --buildsystem=meson'
                 ' --builddirectory={build_dir}'
-                ' -- {args}')
+                ' --max-parallel=%d'
+                ' -- {args}' % self.compile_jobs(context))
 
     @shell_command
     def install(self, context, args):
@@ -25,25 +25,15 @@ import logging
 import os.path as osp
 import shutil
 import sysconfig
-try:
-    import tomllib
-except ModuleNotFoundError:
-    try:
-        import tomli as tomllib
-    except ModuleNotFoundError:
-        # Plugin still works, only needed for autodetection
-        pass
-try:
-    from installer import install
-    from installer.destinations import SchemeDictionaryDestination
-    from installer.sources import WheelFile
-except ModuleNotFoundError:
-    SchemeDictionaryDestination = WheelFile = install = None
-
-from dhpython.build.base import Base, shell_command
+from importlib.util import find_spec
+from dhpython.build.base import (Base, link_or_copy, setuptools_build_dirs,
+                                 shell_command)
 from dhpython.tools import dpkg_architecture
 
 log = logging.getLogger('dhpython')
+# backends that can be asked to not compress the wheel
+SETUPTOOLS_BACKENDS = {None, 'setuptools.build_meta',
+                       'setuptools.build_meta:__legacy__'}
 
 
 class BuildSystem(Base):
@@ -53,6 +43,12 @@ class BuildSystem(Base):
     OPTIONAL_FILES = {}
     CLEAN_FILES = Base.CLEAN_FILES | {'build'}
 
+    def __init__(self, cfg):
+        super().__init__(cfg)
+        # unpacked trees of shared wheels, see _unpack_shared_tree
+        self._unpacked_trees = {}
+        self._backend = False
+
     def detect(self, context):
         """Return certainty level that this plugin describes the right build
         system
@@ -77,11 +73,22 @@ class BuildSystem(Base):
 
     def _build_backend(self):
         """Retrieve the build-system from pyproject.toml, where possible"""
+        # parse pyproject.toml only once, it's needed in most steps
+        if self._backend is False:
+            self._backend = self._read_build_backend()
+        return self._backend
+
+    @staticmethod
+    def _read_build_backend():
         try:
+            try:
+                import tomllib
+            except ModuleNotFoundError:
+                import tomli as tomllib
             with open('pyproject.toml', 'rb') as f:
                 pyproject = tomllib.load(f)
             return pyproject.get('build-system', {}).get('build-backend')
-        except NameError:
+        except ModuleNotFoundError:
             # No toml, no autdetection
             return None
         except FileNotFoundError:
@@ -91,25 +98,35 @@ class BuildSystem(Base):
     def clean(self, context, args):
         super().clean(context, args)
         if osp.exists(args['interpreter'].binary()):
+            from dhpython.build import trash
             log.debug("removing '%s' (and everything under it)",
                       args['build_dir'])
-            if osp.isdir(args['build_dir']):
-                shutil.rmtree(args['build_dir'])
+            trash.discard(args['build_dir'])
+            trash.discard(setuptools_build_dirs(
+                args, copy_egg_info=False)['build']['build_base'])
         return 0  # no need to invoke anything
 
     def configure(self, context, args):
-        if install is None:
+        # installer is used by dhpython.build.unpacker
+        if find_spec('installer') is None:
             raise Exception("PEP517 plugin dependencies are not available. "
                             "Please Build-Depend on pybuild-plugin-pyproject.")
         # No separate configure step
         return 0
 
     def build(self, context, args):
-        self.build_wheel(context, args)
-        self.unpack_wheel(context, args)
+        reused = self.reuse_built_wheel(args)
+        if not (reused or self.get_cached_wheel(context, args)):
+            self.build_wheel(context, args)
+            self.cache_built_wheel(context, args)
+        self.register_built_wheel(context, args)
+        self.unpack_wheel(context, args, reused)
 
     def _backend_config_settings(self):
         backend = self._build_backend()
+        if backend in SETUPTOOLS_BACKENDS and not self.cfg.compress_wheel:
+            # the wheel is unpacked right away, don't waste time on compression
+            return ["--build-option=--compression=stored"]
         if backend == "mesonpy":
             arch_data = dpkg_architecture()
             return [
@@ -123,6 +140,40 @@ class BuildSystem(Base):
             ]
         return []
 
+    def worker_preload(self, context):
+        backend = self._build_backend() or 'setuptools.build_meta'
+        return ('build', backend.split(':', 1)[0])
+
+    def _compile_jobs_settings(self, context, args):
+        """Pass --compile-jobs to the backend, return extra config settings"""
+        jobs = self.compile_jobs(context)
+        backend = self._build_backend()
+        if backend in SETUPTOOLS_BACKENDS:
+            # bdist_wheel cannot pass options to build_ext, see
+            # plugin_distutils.create_pydistutils_cfg. The file is rewritten
+            # by each build, the number of jobs can change.
+            sections = setuptools_build_dirs(args)
+            if jobs > 1:
+                sections['build']['parallel'] = jobs
+            with open(osp.join(args['home_dir'], '.pydistutils.cfg'), 'w',
+                      encoding='utf-8') as fp:
+                for section, options in sections.items():
+                    fp.write('[{}]\n'.format(section))
+                    fp.writelines('{}={}\n'.format(*i) for i in options.items())
+        if jobs < 2:
+            return []
+        # scikit-build(-core) and other CMake based backends, only for
+        # this command (args['ENV'] is created for each step)
+        if 'CMAKE_BUILD_PARALLEL_LEVEL' not in context['ENV']:
+            args.setdefault('ENV', {})['CMAKE_BUILD_PARALLEL_LEVEL'] = str(jobs)
+        if backend == 'mesonpy':
+            return ['compile-args=-j{}'.format(jobs)]
+        return []
+
+    def _wheel_cache_settings(self, context, args):
+        return {'backend': self._build_backend(),
+                'config_settings': self._backend_config_settings()}
+
     @shell_command
     def build_wheel(self, context, args):
         """ build a wheel using the PEP517 builder defined by upstream """
@@ -131,18 +182,18 @@ class BuildSystem(Base):
         config_settings = self._backend_config_settings()
         context['ENV']['FLIT_NO_NETWORK'] = '1'
         context['ENV']['HOME'] = args['home_dir']
+        config_settings += self._compile_jobs_settings(context, args)
         return ('{interpreter} -m build '
                 '--skip-dependency-check --no-isolation --wheel '
                 '--outdir ' + args['home_dir'] + ' ' +
-                ' '.join(('--config-setting ' + setting)
+                ' '.join(('--config-setting=' + setting)
                          for setting in config_settings) +
                 ' {args}'
                )
 
-    def unpack_wheel(self, context, args):
+    def unpack_wheel(self, context, args, reused=False):
         """ unpack the wheel into pybuild's normal  """
-        log.info('Unpacking wheel built for %s with "installer" module',
-                 args['interpreter'])
+        log.info('Unpacking wheel built for %s', args['interpreter'])
         extras = {}
         for extra in ('scripts', 'data'):
             path = Path(args["home_dir"]) / extra
@@ -151,28 +202,63 @@ class BuildSystem(Base):
                             'Is the Python package being built twice?',
                             extra.title())
                 return
-            extras[extra] = path
-        destination = SchemeDictionaryDestination(
-            {
-                'platlib': args['build_dir'],
-                'purelib': args['build_dir'],
-                'scripts': extras['scripts'],
-                'data': extras['data'],
-            },
-            interpreter=args['interpreter'].binary_dv,
-            script_kind='posix',
-        )
+            extras[extra] = str(path)
+        scheme = {
+            'platlib': args['build_dir'],
+            'purelib': args['build_dir'],
+            'scripts': extras['scripts'],
+            'data': extras['data'],
+        }
 
         wheel = Path(self.built_wheel(context, args))
         if wheel.name.startswith('UNKNOWN'):
             raise Exception(f'UNKNOWN wheel found: {wheel.name}. Does '
                             'pyproject.toml specify a build-backend?')
-        with WheelFile.open(wheel) as source:
-            install(
-                source=source,
-                destination=destination,
-                additional_metadata={},
-            )
+        interpreter = args['interpreter'].binary_dv
+        from dhpython.build import unpacker
+        if reused and self._unpack_shared_tree(args, wheel, scheme, interpreter):
+            return
+        unpacker.unpack_wheel(wheel, scheme, interpreter)
+        self._save_shared_tree(args, wheel, scheme)
+
+    def _save_shared_tree(self, args, wheel, scheme):
+        """Keep the tree unpacked from compressed, shared wheel"""
+        from dhpython.build import unpacker
+        shared_wheel = self._shared_wheels.get(self._shared_wheel_key(args))
+        if not shared_wheel or shared_wheel[0] != str(wheel) or \
+                unpacker.is_stored(wheel):
+            return
+        # hard links are enough, build_dir can change later (tests, etc.)
+        # but files are not modified in place
+        tree = Path(args['home_dir']) / 'unpacked'
+        for name in ('purelib', 'data'):
+            if osp.isdir(scheme[name]):
+                shutil.copytree(scheme[name], tree / name,
+                                copy_function=link_or_copy)
+        self._unpacked_trees[shared_wheel[0]] = tree
+
+    def _unpack_shared_tree(self, args, wheel, scheme, interpreter):
+        """Copy files unpacked for another version instead of decompressing
+        the (reused) wheel again
+
+        Only scripts are extracted from the wheel, they contain interpreter
+        specific shebangs.
+
+        :return: True if files were copied, False if the wheel has to be
+            unpacked
+        """
+        shared_wheel = self._shared_wheels.get(self._shared_wheel_key(args))
+        tree = shared_wheel and self._unpacked_trees.get(shared_wheel[0])
+        if not tree or not tree.is_dir():
+            return False
+        log.debug('copying files unpacked from %s for another version',
+                  wheel.name)
+        for name in ('purelib', 'data'):
+            if (tree / name).is_dir():
+                shutil.copytree(tree / name, scheme[name], dirs_exist_ok=True)
+        from dhpython.build import unpacker
+        unpacker.unpack_wheel(wheel, scheme, interpreter, only={'scripts'})
+        return True
 
     def install(self, context, args):
         log.info('Copying package built for %s to destdir',
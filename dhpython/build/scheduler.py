@@ -0,0 +1,228 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from os import environ
+from threading import Condition, Event, Lock
+
+log = logging.getLogger('dhpython')
+
+
+def parallel_jobs(build_options=None):
+    """Return number of parallel jobs requested in DEB_BUILD_OPTIONS.
+
+    >>> parallel_jobs('nocheck parallel=4')
+    4
+    >>> parallel_jobs('parallel=foo')
+    1
+    >>> parallel_jobs('')
+    1
+    """
+    if build_options is None:
+        build_options = environ.get('DEB_BUILD_OPTIONS', '')
+    for option in build_options.split():
+        if option.startswith('parallel='):
+            try:
+                return max(1, int(option[9:]))
+            except ValueError:
+                log.warning('invalid DEB_BUILD_OPTIONS: %s', option)
+    return 1
+
+
+class Sequencer:
+    """Let units pass a critical section in a fixed order.
+
+    Each key has to call :meth:`done` (directly or via :meth:`turn`) before
+    the next one is allowed in, even if given unit skips the section.
+    """
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self._events = {key: Event() for key in self.keys}
+
+    def wait(self, key):
+        idx = self.keys.index(key)
+        if idx:
+            self._events[self.keys[idx - 1]].wait()
+
+    def done(self, key):
+        self._events[key].set()
+
+    @contextmanager
+    def turn(self, key):
+        self.wait(key)
+        try:
+            yield
+        finally:
+            self.done(key)
+
+
+class Stage:
+    """Let up to limit units into a section at a time, in a fixed order.
+
+    pybuild's batch mode uses it for configure, build and install steps, so
+    tests of a version can run while the next version is built (see
+    --overlap).
+    """
+
+    def __init__(self, keys, limit=1):
+        self.keys = list(keys)
+        self.limit = max(1, limit)
+        self.running = 0
+        self._next = 0
+        self._condition = Condition()
+
+    @contextmanager
+    def enter(self, key):
+        idx = self.keys.index(key)
+        with self._condition:
+            while idx != self._next or self.running >= self.limit:
+                self._condition.wait()
+            self._next += 1
+            self.running += 1
+            self._condition.notify_all()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.running -= 1
+                self._condition.notify_all()
+
+
+class Scheduler:
+    """Run independent units (f.e. per-version pipelines) concurrently.
+
+    :param jobs: max. number of units running at the same time
+    :param jobserver: if set, each unit running next to the first one
+        needs a token from this (make's) jobserver
+    """
+
+    def __init__(self, jobs=1, jobserver=None):
+        self.jobs = max(1, jobs)
+        self.jobserver = jobserver
+        self.aborted = Event()
+        self._lock = Lock()
+        self._implicit_slot = True
+
+    def abort(self):
+        """Do not start new steps (see :meth:`check`)."""
+        self.aborted.set()
+
+    def check(self):
+        """Raise an exception if another unit asked to stop the build."""
+        if self.aborted.is_set():
+            raise Aborted('another unit failed')
+
+    def run(self, func, units):
+        """Invoke func(unit) for each unit, return list of (unit, exception).
+
+        Results are returned in the same order as units.
+        """
+        units = list(units)
+        if self.jobs == 1 or len(units) < 2:
+            return [(unit, self._call(func, unit)) for unit in units]
+        with ThreadPoolExecutor(max_workers=min(self.jobs, len(units)),
+                                thread_name_prefix='pybuild') as executor:
+            order = Sequencer(range(len(units)))
+            futures = [executor.submit(self._call_with_slot, func, unit, order, idx)
+                       for idx, unit in enumerate(units)]
+            return [(unit, future.result())
+                    for unit, future in zip(units, futures)]
+
+    def _call_with_slot(self, func, unit, order, idx):
+        # slots are handed out in units' order: a unit waiting for the
+        # previous one (f.e. in Stage.enter) must not hold the slot it needs
+        with order.turn(idx):
+            token = self._acquire_slot()
+        try:
+            return self._call(func, unit)
+        finally:
+            self._release_slot(token)
+
+    def _acquire_slot(self):
+        """Return jobserver token or None if implicit slot was taken"""
+        while True:
+            with self._lock:
+                if self._implicit_slot or self.jobserver is None:
+                    self._implicit_slot = False
+                    return None
+            # wait for a token, but not forever - implicit slot
+            # can be freed in the meantime
+            token = self.jobserver.acquire(timeout=0.1)
+            if token is not None:
+                return token
+
+    def _release_slot(self, token):
+        if token is None:
+            with self._lock:
+                self._implicit_slot = True
+        else:
+            self.jobserver.release(token)
+
+    def _call(self, func, unit):
+        try:
+            func(unit)
+        except Exception as err:
+            return err
+        return None
+
+
+class MemoryBudget:
+    """Admit steps only while their predicted memory usage fits the limit.
+
+    A step is always admitted if nothing else is running, so steps that
+    don't fit next to others (known-heavy ones) are run one at a time.
+
+    :param limit: in bytes, None disables the budget
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.used = 0
+        self.running = 0
+        self._condition = Condition()
+
+    @contextmanager
+    def reserve(self, amount):
+        if self.limit is None:
+            yield
+            return
+        with self._condition:
+            if self.running and self.used + amount > self.limit:
+                log.debug('waiting for %d MiB of memory (%d MiB used by %d'
+                          ' running steps)', amount >> 20, self.used >> 20,
+                          self.running)
+            while self.running and self.used + amount > self.limit:
+                self._condition.wait()
+            self.used += amount
+            self.running += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.used -= amount
+                self.running -= 1
+                self._condition.notify_all()
+
+
+class Aborted(Exception):
+    pass
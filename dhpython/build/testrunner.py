@@ -0,0 +1,224 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+"""Run a test suite in several processes and merge the results.
+
+Usage: testrunner.py --jobs N {unittest,pytest} ARGS...
+
+Each of N shards is a child process that discovers (collects) the whole
+suite with ARGS and runs a part of it: test modules (files) are assigned
+to shards by the number of tests they contain. Output of all shards is
+printed once they finish, the exit code is 0 only if all of them passed
+(5 if no tests were found at all). pytest's record of failed tests (see
+--lf, --ff) is updated with the results of all shards.
+
+The runner is executed by the target interpreter (in the build directory,
+like `python3 -m unittest`), it must not import anything but the standard
+library (and the test framework).
+"""
+
+import json
+import os
+import subprocess
+import sys
+from tempfile import NamedTemporaryFile, TemporaryFile
+
+# exit code of unittest (Python >= 3.12) and pytest if there are no tests
+NO_TESTS = 5
+# pytest's record of tests that failed in the last run
+LASTFAILED = os.path.join('.pytest_cache', 'v', 'cache', 'lastfailed')
+# file a pytest shard writes IDs of its passed and failed tests to
+RESULTS_ENV = 'PYBUILD_TESTRUNNER_RESULTS'
+
+
+def assign(groups, count):
+    """Split {group: number of tests} into count shards, return group→shard
+
+    >>> sorted(assign({'a': 5, 'b': 3, 'c': 2, 'd': 1}, 2).items())
+    [('a', 0), ('b', 1), ('c', 1), ('d', 0)]
+    """
+    load = [0] * count
+    result = {}
+    for group in sorted(groups, key=lambda i: (-groups[i], i)):
+        shard = load.index(min(load))
+        result[group] = shard
+        load[shard] += groups[group]
+    return result
+
+
+def run_unittest(shard, count, args):
+    import unittest  # pylint: disable=import-outside-toplevel
+
+    def tests(suite):
+        for test in suite:
+            if isinstance(test, unittest.TestSuite):
+                yield from tests(test)
+            else:
+                yield test
+
+    def group(test):
+        # failed imports are reported as separate unittest.loader tests
+        module = type(test).__module__
+        return test.id() if module.startswith('unittest.') else module
+
+    class Program(unittest.TestProgram):
+        def runTests(self):
+            selected = list(tests(self.test))
+            groups = {}
+            for test in selected:
+                groups[group(test)] = groups.get(group(test), 0) + 1
+            shards = assign(groups, count)
+            self.test = unittest.TestSuite(
+                i for i in selected if shards[group(i)] == shard)
+            if not self.test.countTestCases():
+                sys.exit(NO_TESTS)
+            super().runTests()
+
+    Program(module=None, argv=['python3 -m unittest'] + args)
+
+
+def run_pytest(shard, count, args):
+    import pytest  # pylint: disable=import-outside-toplevel
+
+    class Shard:
+        @pytest.hookimpl(trylast=True)
+        def pytest_collection_modifyitems(self, config, items):
+            groups = {}
+            for item in items:
+                path = item.nodeid.split('::', 1)[0]
+                groups[path] = groups.get(path, 0) + 1
+            shards = assign(groups, count)
+            deselected = [i for i in items
+                          if shards[i.nodeid.split('::', 1)[0]] != shard]
+            if deselected:
+                config.hook.pytest_deselected(items=deselected)
+                items[:] = [i for i in items
+                            if shards[i.nodeid.split('::', 1)[0]] == shard]
+
+    class Results:
+        # shards would overwrite each other's lastfailed cache entry,
+        # the main process merges their results instead
+        def __init__(self):
+            self.passed = set()
+            self.failed = set()
+
+        def pytest_runtest_logreport(self, report):
+            if report.failed:
+                self.failed.add(report.nodeid)
+            elif report.when == 'call' or report.skipped:
+                self.passed.add(report.nodeid)
+
+        def pytest_collectreport(self, report):
+            if report.failed:
+                self.failed.add(report.nodeid)
+
+        def pytest_sessionfinish(self):
+            with open(os.environ[RESULTS_ENV], 'w', encoding='utf-8') as fp:
+                json.dump({'passed': sorted(self.passed - self.failed),
+                           'failed': sorted(self.failed)}, fp)
+
+    plugins = [Shard()]
+    if os.environ.get(RESULTS_ENV):
+        plugins.append(Results())
+    sys.exit(pytest.main(args, plugins=plugins))
+
+
+def read_json(fpath, default):
+    try:
+        with open(fpath, encoding='utf-8') as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return default
+
+
+def merge_results(lastfailed, results):
+    """Update pytest's lastfailed cache entry with results of all shards"""
+    if not os.path.exists(LASTFAILED):
+        return  # cacheprovider plugin is disabled
+    for item in results:
+        data = read_json(item.name, {})
+        for nodeid in data.get('passed', ()):
+            lastfailed.pop(nodeid, None)
+        for nodeid in data.get('failed', ()):
+            lastfailed[nodeid] = True
+    with open(LASTFAILED, 'w', encoding='utf-8') as fp:
+        json.dump(lastfailed, fp, indent=2, sort_keys=True)
+
+
+def main(argv):
+    if len(argv) < 3 or argv[0] not in ('--jobs', '--shard') or \
+            argv[2] not in ('unittest', 'pytest'):
+        print(__doc__.split('\n\n', 2)[1], file=sys.stderr)
+        return 2
+    option, value, backend, args = argv[0], argv[1], argv[2], argv[3:]
+    if option == '--shard':
+        shard, count = (int(i) for i in value.split('/'))
+        runner = run_unittest if backend == 'unittest' else run_pytest
+        runner(shard, count, args)
+        return 0
+
+    count = max(1, int(value))
+    lastfailed = read_json(LASTFAILED, {})
+    children = []
+    results = []
+    for shard in range(count):
+        output = TemporaryFile()  # pylint: disable=consider-using-with
+        env = None
+        if backend == 'pytest':
+            # pylint: disable=consider-using-with
+            results.append(NamedTemporaryFile(suffix='.json'))
+            env = dict(os.environ, **{RESULTS_ENV: results[-1].name})
+        # pylint: disable=consider-using-with
+        process = subprocess.Popen(
+            [sys.executable, __file__, '--shard', '{}/{}'.format(shard, count),
+             backend] + args, stdout=output, stderr=subprocess.STDOUT, env=env)
+        children.append((process, output))
+
+    returncodes = []
+    for shard, (process, output) in enumerate(children):
+        returncodes.append(process.wait())
+        output.seek(0)
+        sys.stdout.write('=== shard {}/{} (exit code: {}) ===\n'.format(
+            shard + 1, count, returncodes[-1]))
+        sys.stdout.flush()
+        sys.stdout.buffer.write(output.read())
+        output.close()
+    if results:
+        merge_results(lastfailed, results)
+        for item in results:
+            item.close()
+    failed = [str(shard + 1) for shard, code in enumerate(returncodes)
+              if code not in (0, NO_TESTS)]
+    if failed:
+        print('=== {}: shard(s) {} of {} failed ==='.format(
+            backend, ', '.join(failed), count))
+        return 1
+    if all(code == NO_TESTS for code in returncodes):
+        print('=== {}: no tests ran ==='.format(backend))
+        return NO_TESTS
+    print('=== {}: all {} shards passed ==='.format(backend, count))
+    return 0
+
+
+if __name__ == '__main__':
+    # import tests from the current directory, like python3 -m unittest
+    sys.path[0] = os.getcwd()
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,184 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import json
+import logging
+import os
+from contextlib import contextmanager
+from os.path import dirname
+from threading import Lock
+from time import time
+
+log = logging.getLogger('dhpython')
+
+
+class Timeline:
+    """Record of steps and commands, one JSON object per line.
+
+    Every pybuild invocation appends to the same file (debhelper invokes
+    pybuild once per step), so it covers the whole build. Event fields:
+
+    * event: "step" or "command"
+    * step, interpreter, version, plugin
+    * command (command events only)
+    * start, end: seconds since the epoch
+    * returncode: exit code of the command, 0 or 1 for steps
+    * pid
+    * utime, stime, maxrss, read_bytes, write_bytes: resources used by the
+      command (see dhpython.tools.wait), summed up in step events (maxrss
+      is the biggest one)
+    """
+
+    def __init__(self, fpath):
+        self.fpath = fpath
+        self._lock = Lock()
+
+    def write(self, event):
+        line = json.dumps(event, sort_keys=True) + '\n'
+        with self._lock:
+            try:
+                os.makedirs(dirname(self.fpath), exist_ok=True)
+                with open(self.fpath, 'a', encoding='utf-8') as fp:
+                    fp.write(line)
+            except OSError as err:
+                log.debug('cannot write %s: %s', self.fpath, err)
+
+    def step(self, step, interpreter, version, plugin):
+        return Step(self, {'step': step, 'interpreter': str(interpreter),
+                           'version': str(version), 'plugin': plugin})
+
+    def events(self):
+        try:
+            with open(self.fpath, encoding='utf-8') as fp:
+                return [json.loads(line) for line in fp if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def export_chrome(self, fpath):
+        """Write events in Chrome's Trace Event Format
+
+        Each interpreter and version gets its own row (thread), commands
+        are nested in their steps.
+        """
+        rows = {}
+        trace = []
+        for event in self.events():
+            row = event['interpreter']
+            if event['version'] not in row:
+                row = '{} ({})'.format(row, event['version'])
+            if row not in rows:
+                rows[row] = len(rows) + 1
+                trace.append({'name': 'thread_name', 'ph': 'M', 'pid': 1,
+                              'tid': rows[row], 'args': {'name': row}})
+            trace.append({
+                'name': event.get('command') or event['step'],
+                'cat': event['event'],
+                'ph': 'X',
+                'ts': int(event['start'] * 1000000),
+                'dur': int((event['end'] - event['start']) * 1000000),
+                'pid': 1,
+                'tid': rows[row],
+                'args': {k: event[k] for k in ('step', 'plugin', 'returncode', 'pid')},
+            })
+        trace.insert(0, {'name': 'process_name', 'ph': 'M', 'pid': 1,
+                         'args': {'name': 'pybuild'}})
+        with open(fpath, 'w', encoding='utf-8') as fp:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, fp)
+
+    def stats(self):
+        """Return table with resources used by each step and version"""
+        versions = {}
+        for event in self.events():
+            if event['event'] == 'step':
+                # the last invocation of each step counts
+                versions.setdefault(event['interpreter'], {})[event['step']] = event
+        rows = [('', 'step', 'wall [s]', 'user [s]', 'sys [s]',
+                 'peak RSS [MiB]', 'read [MiB]', 'written [MiB]')]
+        for interpreter, steps in versions.items():
+            for step, event in steps.items():
+                rows.append(_stats_row(interpreter, step, [event]))
+            if len(steps) > 1:
+                rows.append(_stats_row(interpreter, 'total', steps.values()))
+        if len(versions) > 1:
+            rows.append(_stats_row('all', 'total', [
+                event for steps in versions.values() for event in steps.values()]))
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return '\n'.join('  '.join(
+            cell.ljust(width) if i < 2 else cell.rjust(width)
+            for i, (cell, width) in enumerate(zip(row, widths))).rstrip()
+            for row in rows)
+
+
+def _stats_row(interpreter, step, events):
+    def total(key):
+        return sum(event.get(key, 0) for event in events)
+    return (interpreter, step,
+            '{:.1f}'.format(sum(event['end'] - event['start'] for event in events)),
+            '{:.1f}'.format(total('utime')),
+            '{:.1f}'.format(total('stime')),
+            '{:.0f}'.format(max(event.get('maxrss', 0) for event in events) / 1024),
+            '{:.0f}'.format(total('read_bytes') / 1048576),
+            '{:.0f}'.format(total('write_bytes') / 1048576))
+
+
+class Step:
+    """Events of a single step of one interpreter version"""
+
+    def __init__(self, timeline, info):
+        self.timeline = timeline
+        self.info = info
+        self.resources = {}
+
+    def _add(self, resources):
+        for key, value in resources.items():
+            if key == 'maxrss':
+                self.resources[key] = max(self.resources.get(key, 0), value)
+            else:
+                self.resources[key] = self.resources.get(key, 0) + value
+
+    @contextmanager
+    def record(self):
+        """Record the step, it failed if an exception is raised"""
+        start = time()
+        returncode = 1
+        self.resources = {}
+        try:
+            yield
+            returncode = 0
+        finally:
+            self.timeline.write(dict(self.info, event='step', start=start,
+                                     end=time(), returncode=returncode,
+                                     pid=os.getpid(), **self.resources))
+
+    @contextmanager
+    def command(self, command):
+        """Record a command, set 'returncode' and 'resources' (see
+        dhpython.tools.execute) in the yielded dict"""
+        start = time()
+        result = {'returncode': None, 'resources': None}
+        try:
+            yield result
+        finally:
+            resources = result['resources'] or {}
+            self._add(resources)
+            self.timeline.write(dict(self.info, event='command', command=command,
+                                     start=start, end=time(),
+                                     returncode=result['returncode'],
+                                     pid=os.getpid(), **resources))
@@ -0,0 +1,105 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+"""Remove directories in the background.
+
+Directories are atomically renamed to the trash directory (if it's on the
+same file system) and removed by a background thread, so that the next
+step doesn't wait for removal of f.e. gigabytes of object files.
+"""
+
+import logging
+import os
+from os.path import abspath, basename, isdir, join
+from shutil import rmtree
+from threading import Lock, Thread
+from uuid import uuid4
+
+log = logging.getLogger('dhpython')
+
+TRASH_DIR = '.pybuild/trash'
+
+
+class Trash:
+    def __init__(self, dpath):
+        self.dpath = dpath
+        self._lock = Lock()
+        self._thread = None
+
+    def discard(self, path):
+        """Remove path in the background (or right away if it cannot be moved)"""
+        if not isdir(path):
+            return
+        target = join(self.dpath, '{}-{}'.format(uuid4().hex, basename(path.rstrip('/'))))
+        with self._lock:
+            try:
+                os.makedirs(self.dpath, exist_ok=True)
+                os.rename(path, target)
+            except OSError as err:
+                log.debug('cannot move %s to %s: %s', path, self.dpath, err)
+                rmtree(path)
+                return
+            log.debug('removing %s in the background', path)
+            if self._thread is None:
+                self._thread = Thread(target=self._empty, name='trash', daemon=True)
+                self._thread.start()
+
+    def _empty(self):
+        failed = set()
+        while True:
+            with self._lock:
+                # new directories are moved here while the lock is held
+                try:
+                    names = set(os.listdir(self.dpath)) - failed
+                except OSError:
+                    names = set()
+                if not names:
+                    self._thread = None
+                    return
+            for name in names:
+                rmtree(join(self.dpath, name), ignore_errors=True)
+                if isdir(join(self.dpath, name)):
+                    log.debug('cannot remove %s', join(self.dpath, name))
+                    failed.add(name)
+
+    def wait(self):
+        """Wait for the removal of all discarded directories"""
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+
+_trash = None
+
+
+def discard(path):
+    """Move directory to .pybuild/trash/ and remove it in the background"""
+    global _trash  # pylint: disable=global-statement
+    if _trash is None:
+        _trash = Trash(abspath(TRASH_DIR))
+    _trash.discard(path)
+
+
+def wait():
+    """Wait for the removal of directories passed to discard()"""
+    if _trash is not None:
+        _trash.wait()
@@ -0,0 +1,210 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import io
+import logging
+import mmap
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import BytesParser
+from os.path import dirname, join
+from shutil import copyfileobj
+from zipfile import ZIP_STORED, ZipFile
+
+log = logging.getLogger('dhpython')
+SCHEMES = ('purelib', 'platlib', 'headers', 'scripts', 'data')
+BUFSIZE = 1024 * 1024
+# wheels with fewer files are extracted in the main thread
+PARALLEL_THRESHOLD = 64
+
+
+class MappedFile(io.RawIOBase):
+    """Read-only, seekable file object backed by mmap."""
+
+    def __init__(self, fpath):
+        super().__init__()
+        with open(fpath, 'rb') as fp:
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._map[self._pos:self._pos + len(b)]
+        b[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._map)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._map.close()
+        super().close()
+
+
+def _umask():
+    # os.umask() cannot be used to read the value without changing it,
+    # and other threads could create files in the meantime
+    try:
+        with open('/proc/self/status', encoding='ascii') as fp:
+            for line in fp:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except OSError:
+        pass
+    return 0o022
+
+
+def is_stored(wheel):
+    """Check if all files in the wheel are stored without compression"""
+    with ZipFile(wheel) as zfile:
+        return all(info.compress_type == ZIP_STORED
+                   for info in zfile.infolist())
+
+
+def _dist_info_dir(names):
+    dirs = {name.split('/', 1)[0] for name in names
+            if name.split('/', 1)[0].endswith('.dist-info')}
+    if len(dirs) != 1:
+        raise Exception('expected exactly 1 .dist-info directory in the wheel,'
+                        ' found %d' % len(dirs))
+    return dirs.pop()
+
+
+def _target(info, data_dir, root_scheme, scheme):
+    """Return (scheme name, destination path) of the zip member"""
+    path = info.filename
+    parts = path.split('/')
+    if path.startswith('/') or '..' in parts:
+        raise Exception('invalid path in the wheel: %s' % path)
+    if parts[0] == data_dir:
+        if len(parts) < 3 or parts[1] not in SCHEMES:
+            raise Exception('%s is not contained in a valid .data subdirectory'
+                            % path)
+        name, path = parts[1], posixpath.join(*parts[2:])
+    else:
+        name = root_scheme
+    if name not in scheme:
+        raise Exception('wheel installs files to unsupported %s scheme: %s'
+                        % (name, info.filename))
+    return name, join(scheme[name], path)
+
+
+def _extract(zfile, info, scheme_name, dst, *, interpreter, exec_mode):
+    with zfile.open(info) as src, open(dst, 'xb') as fp:
+        if scheme_name == 'scripts':
+            head = src.read(8)
+            if head == b'#!python':
+                src.readline()  # skip the rest of the shebang line
+                head = '#!{}\n'.format(interpreter).encode('utf-8')
+            fp.write(head)
+        copyfileobj(src, fp, BUFSIZE)
+    if scheme_name == 'scripts' or info.external_attr >> 16 & 0o111:
+        os.chmod(dst, exec_mode)
+
+
+def unpack_wheel(wheel, scheme, interpreter, jobs=None, only=None):
+    """Extract wheel into scheme directories, like installer.install() does.
+
+    Members are streamed directly from the (memory mapped) archive,
+    in parallel for bigger wheels. RECORD file is not written (and no
+    hashes are computed), dh_python3 removes it from Debian packages anyway.
+
+    :param scheme: dictionary with destination directories, keys are scheme
+        names (purelib, platlib, scripts, data, headers)
+    :param interpreter: used in shebangs of scripts
+    :param jobs: max. number of threads (default: number of CPUs, max. 8)
+    :param only: names of schemes to extract, files from other schemes
+        are skipped (default: all)
+    """
+    from installer.scripts import Script
+    from installer.utils import parse_entrypoints
+
+    with MappedFile(wheel) as mapped, ZipFile(mapped) as zfile:
+        infos = zfile.infolist()
+        dist_info = _dist_info_dir(info.filename for info in infos)
+        data_dir = dist_info[:-len('.dist-info')] + '.data'
+        metadata = BytesParser().parsebytes(
+            zfile.read(dist_info + '/WHEEL'), headersonly=True)
+        if not (metadata['Wheel-Version'] or '').startswith('1.'):
+            raise Exception('incompatible Wheel-Version {}, only version 1.x'
+                            ' wheels are supported'.format(metadata['Wheel-Version']))
+        if metadata['Root-Is-Purelib'] == 'true':
+            root_scheme = 'purelib'
+        else:
+            root_scheme = 'platlib'
+
+        exec_mode = 0o777 & ~_umask() | 0o111
+
+        # entry points are not in the archive, generate them
+        names = {info.filename for info in infos}
+        if dist_info + '/entry_points.txt' in names and \
+                (only is None or 'scripts' in only):
+            text = zfile.read(dist_info + '/entry_points.txt').decode('utf-8')
+            for name, module, attr, section in parse_entrypoints(text):
+                name, data = Script(name, module, attr, section).generate(
+                    interpreter, kind='posix')
+                dst = join(scheme['scripts'], name)
+                os.makedirs(dirname(dst), exist_ok=True)
+                with open(dst, 'xb') as fp:
+                    fp.write(data)
+                os.chmod(dst, exec_mode)
+
+        tasks = []
+        for info in infos:
+            if info.is_dir() or info.filename == dist_info + '/RECORD':
+                continue
+            scheme_name, dst = _target(info, data_dir, root_scheme, scheme)
+            if only is not None and scheme_name not in only:
+                continue
+            tasks.append((info, scheme_name, dst))
+        # create directories upfront, threads don't have to care about races
+        for dpath in sorted({dirname(dst) for _, _, dst in tasks}):
+            os.makedirs(dpath, exist_ok=True)
+
+        jobs = jobs or min(8, os.cpu_count() or 1)
+        if jobs == 1 or len(tasks) < PARALLEL_THRESHOLD:
+            for info, scheme_name, dst in tasks:
+                _extract(zfile, info, scheme_name, dst,
+                         interpreter=interpreter, exec_mode=exec_mode)
+        else:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                futures = [executor.submit(_extract, zfile, info, scheme_name,
+                                           dst, interpreter=interpreter,
+                                           exec_mode=exec_mode)
+                           for info, scheme_name, dst in tasks]
+                for future in futures:
+                    future.result()
+    log.debug('unpacked %d files from %s', len(tasks), wheel)
@@ -0,0 +1,426 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Fork server that runs Python commands with pre-imported modules.
+
+One server is started per interpreter (and interpreter startup
+environment). It imports setuptools and the build backend once and forks
+a child for each command, so steps don't pay for these imports again.
+The server is executed by the target interpreter, it must not import
+anything but the standard library.
+"""
+
+import atexit
+import fcntl
+import json
+import logging
+import os
+import re
+import shlex
+import signal
+import socket
+import struct
+import subprocess
+import sys
+from datetime import datetime
+from os.path import abspath, basename, dirname, join, realpath
+from shutil import rmtree, which
+from tempfile import TemporaryFile, mkdtemp
+from threading import Event, Lock, Thread
+
+log = logging.getLogger('dhpython')
+
+INTERPRETER_RE = re.compile(r'^(python|pypy)\d*(\.\d+)?(-dbg)?$')
+# commands with these characters have to be interpreted by the shell
+SHELL_CHARS = set('$`\\\n~*?[]{}!#')
+SHELL_OPERATORS = set('();<>|&')
+# environment variables read by the interpreter or pre-imported modules
+# at startup, server is started again if they change
+STARTUP_ENV_RE = re.compile(
+    r'^(_?PYTHON(?!PATH$)|SETUPTOOLS_|DEB_PYTHON_|LC_)\w*$|^(HOME|LANG|LANGUAGE)$')
+HEADER = struct.Struct('!I')
+# stdin, stdout, stderr and pass_fds (f.e. make's jobserver) of a request
+MAX_FDS = 16
+BOOTSTRAP = ("import sys, runpy; del sys.path[0];"
+             " runpy.run_path(sys.argv[1], run_name='__pybuild_worker__')")
+
+_workers = {}
+_lock = Lock()
+
+
+def parse(command):
+    """Return (interpreter, arguments) if shell is not needed to run command
+
+    >>> parse("python3.11 setup.py build --force")
+    ('python3.11', ['setup.py', 'build', '--force'])
+    >>> parse("cd build; python3 -m pytest") is None
+    True
+    >>> parse("python3 -W error setup.py build") is None
+    True
+    """
+    if SHELL_CHARS.intersection(command):
+        return None
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        argv = list(lexer)
+    except ValueError:
+        return None
+    if len(argv) < 2 or not INTERPRETER_RE.match(basename(argv[0])):
+        return None
+    if any(set(i) <= SHELL_OPERATORS for i in argv):
+        return None
+    if argv[1].startswith('-') and (argv[1] not in ('-c', '-m') or len(argv) < 3):
+        return None
+    return argv[0], argv[1:]
+
+
+def execute(command, cwd, env, log_output=None, *, preload=(), pass_fds=()):
+    """Execute command in a worker, like dhpython.tools.execute does.
+
+    :param preload: modules imported by the worker before the first fork
+    :param pass_fds: file descriptors to keep open (with the same numbers)
+        in the child
+    :return: None if command cannot be executed by a worker
+    """
+    parsed = parse(command)
+    if not parsed or len(pass_fds) > MAX_FDS - 3:
+        return None
+    exe = which(parsed[0], path=env.get('PATH'))
+    if not exe:
+        return None
+    worker = _get_worker(exe, env, tuple(preload))
+    if worker is None:
+        return None
+
+    close = []
+    pipe = None
+    try:
+        if log_output is False:
+            out = err = None
+        elif log_output is None:
+            # pylint: disable=consider-using-with
+            out = TemporaryFile()
+            err = TemporaryFile()
+            close.extend((out, err))
+        elif isinstance(log_output, str):
+            # see dhpython.tools.execute
+            # pylint: disable=import-outside-toplevel
+            from dhpython.tools import open_log
+            log_output = open_log(log_output)
+            close.append(log_output)
+            log_output.write('\n# command executed on {}\n$ {}\n'.format(
+                datetime.now().isoformat(), command).encode('utf-8'))
+            pipe = os.pipe()
+            out = err = None
+        else:
+            log_output.write('\n# command executed on {}'.format(datetime.now().isoformat()))
+            log_output.write('\n$ {}\n'.format(command))
+            log_output.flush()
+            out = err = log_output
+
+        fds = (0, out.fileno() if out else 1, err.fileno() if err else 2)
+        tail = None
+        if pipe:
+            from dhpython.tools import pump  # pylint: disable=import-outside-toplevel
+            fds = (0, pipe[1], pipe[1])
+            finished = Event()
+            pumped = {}
+            thread = Thread(target=lambda: pumped.update(tail=pump(
+                pipe[0], log_output, finished.is_set)), daemon=True)
+            thread.start()
+        log.debug('invoking (worker): %s', command)
+        try:
+            returncode, resources = worker.run(parsed[1], cwd, env, fds, pass_fds)
+        finally:
+            if pipe:
+                os.close(pipe[1])
+                finished.set()
+                thread.join()
+                tail = pumped.get('tail')
+
+        stdout = stderr = None
+        if log_output is None:
+            out.seek(0)
+            err.seek(0)
+            stdout = out.read()
+            stderr = err.read()
+        return {
+            "returncode": returncode,
+            "stdout": stdout is not None and str(stdout, 'utf-8'),
+            "stderr": stderr is not None and str(stderr, 'utf-8'),
+            "resources": resources,
+            "tail": tail and tail.decode('utf-8', 'replace'),
+        }
+    finally:
+        if pipe:
+            os.close(pipe[0])
+        for fp in close:
+            fp.close()
+
+
+def _get_worker(exe, env, preload):
+    startup_env = {k: v for k, v in env.items() if STARTUP_ENV_RE.match(k)}
+    key = (exe, json.dumps(startup_env, sort_keys=True), preload)
+    with _lock:
+        if key not in _workers:
+            if not _workers:
+                atexit.register(stop_all)
+            server_env = {k: v for k, v in env.items() if k != 'PYTHONPATH'}
+            try:
+                _workers[key] = Worker(exe, server_env, preload)
+            except Exception as err:
+                log.debug('cannot start build worker for %s: %s', exe, err)
+                _workers[key] = None
+        return _workers[key]
+
+
+def stop_all():
+    with _lock:
+        for worker in _workers.values():
+            if worker is not None:
+                worker.stop()
+        _workers.clear()
+
+
+class Worker:
+    """Client side of the fork server, started by the constructor"""
+
+    def __init__(self, exe, env, preload=()):
+        self.exe = exe
+        self._tmp_dir = mkdtemp(prefix='pybuild-worker-')
+        self.path = join(self._tmp_dir, 'socket')
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+        self._sock.listen()
+        # server exits when pybuild closes its end of this pipe
+        lifeline_r, self._lifeline = os.pipe()
+        fds = (self._sock.fileno(), lifeline_r)
+        # pylint: disable=consider-using-with
+        self._process = subprocess.Popen(
+            [exe, '-c', BOOTSTRAP, abspath(__file__)] + [str(i) for i in fds]
+            + list(preload),
+            env=env, pass_fds=fds, stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL)
+        os.close(lifeline_r)
+
+    def run(self, args, cwd, env, fds, pass_fds=()):
+        """Run interpreter with given arguments in a fresh child
+
+        :param fds: file descriptors used as stdin, stdout and stderr
+        :param pass_fds: file descriptors to keep open in the child
+        :return: exit code (negative if child was killed by a signal) and
+            resources it used (see dhpython.tools.wait)
+        """
+        request = json.dumps({'args': args, 'cwd': cwd, 'env': env,
+                              'pass_fds': list(pass_fds)}).encode('utf-8')
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(self.path)
+            socket.send_fds(conn, [HEADER.pack(len(request))],
+                            list(fds) + list(pass_fds))
+            conn.sendall(request)
+            response = _recv_all(conn)
+        if not response:
+            raise Exception('build worker for {} died'.format(self.exe))
+        response = json.loads(response)
+        return response['returncode'], response['resources']
+
+    def stop(self):
+        os.close(self._lifeline)
+        self._sock.close()
+        self._process.wait()
+        rmtree(self._tmp_dir, ignore_errors=True)
+
+
+def _recv_all(conn, size=None):
+    chunks = []
+    received = 0
+    while size is None or received < size:
+        chunk = conn.recv(65536 if size is None else min(65536, size - received))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        received += len(chunk)
+    return b''.join(chunks)
+
+
+def _exit(code):
+    """Exit the child like the interpreter does after running __main__"""
+    # pylint: disable=protected-access
+    atexit._run_exitfuncs()
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except Exception:
+            pass
+    os._exit(code)
+
+
+def _run(args, cwd, env, base_path):
+    """Emulate `python ARGS` in a forked child, never returns"""
+    import runpy  # pylint: disable=import-outside-toplevel
+    import types  # pylint: disable=import-outside-toplevel
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    code = 0
+    try:
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(env)
+        pythonpath = [i for i in env.get('PYTHONPATH', '').split(':') if i]
+        if args[0] == '-c':
+            sys.argv = ['-c'] + args[2:]
+            sys.path[:] = [''] + pythonpath + base_path
+            main = types.ModuleType('__main__')
+            sys.modules['__main__'] = main
+            exec(compile(args[1], '<string>', 'exec'), main.__dict__)  # pylint: disable=exec-used
+        elif args[0] == '-m':
+            sys.argv = [args[1]] + args[2:]
+            sys.path[:] = [os.getcwd()] + pythonpath + base_path
+            runpy.run_module(args[1], run_name='__main__', alter_sys=True)
+        else:
+            sys.argv = list(args)
+            sys.path[:] = [dirname(realpath(args[0]))] + pythonpath + base_path
+            runpy.run_path(args[0], run_name='__main__')
+    except SystemExit as err:
+        if err.code is None:
+            code = 0
+        elif isinstance(err.code, int):
+            code = err.code
+        else:
+            print(err.code, file=sys.stderr)
+            code = 1
+    except BaseException as err:  # pylint: disable=broad-except
+        # skip this function's frame
+        sys.excepthook(type(err), err, err.__traceback__.tb_next)
+        code = 1
+    _exit(code)
+
+
+def _patch_hook_runner(base_path):
+    """Run PEP 517 hooks in forked children as well"""
+    try:
+        import pyproject_hooks  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return
+    default_runner = pyproject_hooks.default_subprocess_runner
+
+    def runner(cmd, cwd=None, extra_environ=None):
+        if cmd[0] != sys.executable:
+            return default_runner(cmd, cwd, extra_environ)
+        env = dict(os.environ)
+        env.update(extra_environ or {})
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            _run(cmd[1:], cwd or os.getcwd(), env, base_path)
+        returncode = os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, cmd)
+        return None
+
+    pyproject_hooks.default_subprocess_runner = runner
+
+
+def _wait(pid):
+    """Return exit code and resources used by child (see dhpython.tools.wait)"""
+    resources = {}
+    # I/O counters are gone once the child is reaped
+    os.waitid(os.P_PID, pid, os.WEXITED | os.WNOWAIT)
+    try:
+        with open('/proc/{}/io'.format(pid), encoding='ascii') as fp:
+            for line in fp:
+                key, value = line.split(':', 1)
+                if key in ('read_bytes', 'write_bytes'):
+                    resources[key] = int(value)
+    except OSError:
+        pass
+    _, status, rusage = os.wait4(pid, 0)
+    resources.update(utime=rusage.ru_utime, stime=rusage.ru_stime,
+                     maxrss=rusage.ru_maxrss)
+    return os.waitstatus_to_exitcode(status), resources
+
+
+def _handle(conn, base_path):
+    """Run one request, in a child of the server"""
+    header, fds, _, _ = socket.recv_fds(conn, HEADER.size, MAX_FDS)
+    request = json.loads(_recv_all(conn, HEADER.unpack(header)[0]))
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    pid = os.fork()
+    if pid == 0:
+        conn.close()
+        # stdin, stdout, stderr and pass_fds, with their original numbers
+        targets = [0, 1, 2] + request['pass_fds']
+        # move received descriptors out of the way first, they can
+        # occupy one of the target numbers
+        floor = max(targets + fds) + 1
+        moved = []
+        for fd in fds:
+            moved.append(fcntl.fcntl(fd, fcntl.F_DUPFD, floor))
+            os.close(fd)
+        for target, fd in zip(targets, moved):
+            os.dup2(fd, target)
+            os.close(fd)
+        _run(request['args'], request['cwd'], request['env'], base_path)
+    for fd in fds:
+        os.close(fd)
+    returncode, resources = _wait(pid)
+    conn.sendall(json.dumps({'returncode': returncode,
+                             'resources': resources}).encode('utf-8'))
+
+
+def serve(sock_fd, lifeline_fd, preload):
+    import importlib  # pylint: disable=import-outside-toplevel
+    import selectors  # pylint: disable=import-outside-toplevel
+    base_path = list(sys.path)
+    _patch_hook_runner(base_path)
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception:  # pylint: disable=broad-except
+            # f.e. in-tree backend, children will import it themselves
+            pass
+    # children are not waited for, handlers report their exit codes
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    sock = socket.socket(fileno=sock_fd)
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+    selector.register(lifeline_fd, selectors.EVENT_READ)
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj == lifeline_fd:
+                return
+            conn, _ = sock.accept()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if os.fork() == 0:
+                selector.close()
+                sock.close()
+                try:
+                    _handle(conn, base_path)
+                finally:
+                    os._exit(0)
+            conn.close()
+
+
+if __name__ == '__pybuild_worker__':
+    serve(int(sys.argv[2]), int(sys.argv[3]), sys.argv[4:])
@@ -21,10 +21,11 @@
 import errno
 import logging
 import re
-from os import makedirs, chmod, environ
+from os import makedirs, chmod, environ, getcwd
 from os.path import basename, exists, join, dirname
 from sys import argv
 from dhpython import DEPENDS_SUBSTVARS, PKG_NAME_TPLS, RT_LOCATIONS, RT_TPLS
+from dhpython.tools import memoize
 
 log = logging.getLogger('dhpython')
 parse_dep = re.compile(r'''[,\s]*
@@ -50,6 +51,19 @@ def build_options(**options):
     return type('Options', (object,), built_options)
 
 
+def build_depends():
+    """Return Build-Depends of the source package in current directory.
+
+    debian/control is parsed once, see :class:`DebHelper`.
+    """
+    return _build_depends(getcwd())
+
+
+@memoize
+def _build_depends(path):  # pylint: disable=unused-argument
+    return DebHelper(build_options()).build_depends
+
+
 class DebHelper:
     """Reinvents the wheel / some dh functionality (Perl is ugly ;-P)"""
 
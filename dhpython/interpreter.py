@@ -23,6 +23,7 @@ import os
 import re
 from os.path import exists, join, split
 from dhpython import INTERPRETER_DIR_TPLS, PUBLIC_DIR_RE, OLD_SITE_DIRS
+from dhpython import supervisor
 
 SHEBANG_RE = re.compile(r'''
     (?:\#!\s*){0,1}  # shebang prefix
@@ -55,6 +56,9 @@ EXTFILE_RE = re.compile(r'''
     (?P<debug>_d)?
     \.so$''', re.VERBOSE)
 log = logging.getLogger('dhpython')
+CONFIG_CMD = 'import sysconfig as s; print("__SEP__".join(i or "" ' \
+             'for i in s.get_config_vars(' \
+             '"SOABI", "MULTIARCH", "INCLUDEPY", "LIBPL", "LDLIBRARY")))'
 
 
 class Interpreter:
@@ -481,12 +485,25 @@ class Interpreter:
             result += '-dbg'
         return result
 
+    def prefetch_config(self, versions):
+        """Query configuration of all given versions at the same time.
+
+        Results are cached, failures are reported once given version's
+        configuration is used.
+        """
+        probes = []
+        for version in versions:
+            key, argv = self._command(CONFIG_CMD, version)
+            if key not in self.__class__._cache and exists(argv[0]):
+                probes.append((key, argv))
+        outputs = supervisor.run_all(argv for _, argv in probes)
+        for (key, _), output in zip(probes, outputs):
+            if output['returncode'] == 0:
+                self.__class__._cache[key] = self._result(output)
+
     def _get_config(self, version=None):
         version = Version(version or self.version)
-        cmd = 'import sysconfig as s; print("__SEP__".join(i or "" ' \
-               'for i in s.get_config_vars('\
-               '"SOABI", "MULTIARCH", "INCLUDEPY", "LIBPL", "LDLIBRARY")))'
-        conf_vars = self._execute(cmd, version).split('__SEP__')
+        conf_vars = self._execute(CONFIG_CMD, version).split('__SEP__')
         if conf_vars[1] in conf_vars[0]:
             # Python >= 3.5 includes MILTIARCH in SOABI
             conf_vars[0] = conf_vars[0].replace("-%s" % conf_vars[1], '')
@@ -496,25 +513,33 @@ class Interpreter:
             pass
         return conf_vars
 
-    def _execute(self, command, version=None, cache=True):
+    def _command(self, command, version=None):
+        """Return cache key and argv of Python code executed by interpreter"""
         version = Version(version or self.version)
         exe = "{}{}".format(self.path, self._vstr(version))
-        command = "{} -c '{}'".format(exe, command.replace("'", "\'"))
+        return "{} -c '{}'".format(exe, command), (exe, '-c', command)
+
+    @staticmethod
+    def _result(output):
+        result = output['stdout'].splitlines()
+        if len(result) == 1:
+            result = result[0]
+        return result
+
+    def _execute(self, command, version=None, cache=True):
+        command, argv = self._command(command, version)
         if cache and command in self.__class__._cache:
             return self.__class__._cache[command]
-        if not exists(exe):
+        if not exists(argv[0]):
             raise Exception("cannot execute command due to missing "
-                            "interpreter: %s" % exe)
+                            "interpreter: %s" % argv[0])
 
-        output = execute(command)
+        output = supervisor.run(argv)
         if output['returncode'] != 0:
             log.debug(output['stderr'])
             raise Exception('{} failed with status code {}'.format(command, output['returncode']))
 
-        result = output['stdout'].splitlines()
-
-        if len(result) == 1:
-            result = result[0]
+        result = self._result(output)
 
         if cache:
             self.__class__._cache[command] = result
@@ -522,5 +547,4 @@ class Interpreter:
         return result
 
 # due to circular imports issue
-from dhpython.tools import execute
 from dhpython.version import Version, default
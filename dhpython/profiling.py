@@ -0,0 +1,100 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""Profiling of dh_python3 and pybuild themselves (see DH_PYTHON_PROFILE)."""
+
+import logging
+import os
+from contextlib import contextmanager
+from os import environ
+from os.path import join
+from time import perf_counter
+
+log = logging.getLogger('dhpython')
+MODES = ('cprofile', 'tracemalloc')
+DEFAULT_DIR = 'debian/.debhelper/profile'
+
+
+@contextmanager
+def profiled(name, mode=None):
+    """Profile the block if requested via DH_PYTHON_PROFILE or mode
+
+    cprofile writes NAME-PID.prof (see pstats module), tracemalloc writes
+    a snapshot to NAME-PID.tracemalloc (see tracemalloc.Snapshot.load),
+    both in DH_PYTHON_PROFILE_DIR (default: debian/.debhelper/profile).
+    """
+    mode = mode or environ.get('DH_PYTHON_PROFILE')
+    if not mode:
+        yield
+        return
+    if mode not in MODES:
+        log.warning('unknown DH_PYTHON_PROFILE mode: %s (use one of: %s)',
+                    mode, ', '.join(MODES))
+        yield
+        return
+    dpath = environ.get('DH_PYTHON_PROFILE_DIR', DEFAULT_DIR)
+    fpath = join(dpath, '{}-{}'.format(name, os.getpid()))
+    if mode == 'cprofile':
+        # pylint: disable=import-outside-toplevel
+        from cProfile import Profile
+        profile = Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            os.makedirs(dpath, exist_ok=True)
+            profile.dump_stats(fpath + '.prof')
+            log.info('profile written to %s.prof', fpath)
+    else:
+        import tracemalloc  # pylint: disable=import-outside-toplevel
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            os.makedirs(dpath, exist_ok=True)
+            snapshot.dump(fpath + '.tracemalloc')
+            log.info('memory snapshot written to %s.tracemalloc (peak: %.1f MiB)',
+                     fpath, peak / 1048576)
+            for stat in snapshot.statistics('lineno')[:10]:
+                log.info('  %s', stat)
+
+
+class Phases:
+    """Time spent in each phase, summed up over all invocations"""
+
+    def __init__(self):
+        self.times = {}
+
+    @contextmanager
+    def __call__(self, name):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0) + perf_counter() - start
+
+    def summary(self):
+        width = max((len(name) for name in self.times), default=0)
+        return '\n'.join('{}  {:8.3f}s'.format(name.ljust(width), seconds)
+                         for name, seconds in self.times.items())
@@ -19,12 +19,9 @@
 # THE SOFTWARE.
 
 
-import email
 import logging
-import platform
 import os
 import re
-import subprocess
 from functools import partial
 from os.path import exists, isdir, join
 
@@ -34,6 +31,7 @@ if __name__ == '__main__':
 
 from dhpython import PKG_PREFIX_MAP, PUBLIC_DIR_RE,\
     PYDIST_DIRS, PYDIST_OVERRIDES_FNAMES, PYDIST_DPKG_SEARCH_TPLS
+from dhpython import supervisor
 from dhpython.markers import ComplexEnvironmentMarker, parse_environment_marker
 from dhpython.tools import memoize
 from dhpython.version import get_requested_versions, Version
@@ -109,6 +107,7 @@ DEB_VERS_OPS = {
 }
 # Optimize away any dependencies on Python less than:
 MIN_PY_VERSION = [3, 9]
+REQ_NAME_RE = re.compile(r'([^!><=~ \(\)\[;]+)(.*)')
 
 
 def validate(fpath):
@@ -170,7 +169,13 @@ def load(impl):
 
 
 def guess_dependency(impl, req, version=None, bdep=None,
-                     accept_upstream_versions=False):
+                     accept_upstream_versions=False, *, dpkg_results=None):
+    """Return Debian dependency for given requirement
+
+    :param dpkg_results: results of dpkg -S queries (see dpkg_search_all),
+        if the query of this requirement is not there yet, it's added
+        (with None as the result) and None is returned
+    """
     bdep = bdep or {}
     log.debug('trying to find dependency for %s (python=%s)',
               req, version)
@@ -178,7 +183,7 @@ def guess_dependency(impl, req, version=None, bdep=None,
         version = Version(version)
 
     # some upstreams have weird ideas for distribution name...
-    name, rest = re.compile(r'([^!><=~ \(\)\[;]+)(.*)').match(req).groups()
+    name, rest = REQ_NAME_RE.match(req).groups()
     # TODO: check stdlib and dist-packaged for name.py and name.so files
     req = safe_name(name) + rest
 
@@ -288,14 +293,17 @@ def guess_dependency(impl, req, version=None, bdep=None,
     dpkg_query_tpl, regex_filter = PYDIST_DPKG_SEARCH_TPLS[impl]
     dpkg_query = dpkg_query_tpl.format(ci_regexp(safe_name(name)))
 
-    log.debug("invoking dpkg -S %s", dpkg_query)
-    process = subprocess.run(
-        ('/usr/bin/dpkg', '-S', dpkg_query),
-        check=False, encoding="UTF-8", capture_output=True,
-    )
-    if process.returncode == 0:
+    if dpkg_results is None:
+        log.debug("invoking dpkg -S %s", dpkg_query)
+        process = supervisor.run(('/usr/bin/dpkg', '-S', dpkg_query))
+    elif dpkg_results.get(dpkg_query) is None:
+        dpkg_results[dpkg_query] = None
+        return None
+    else:
+        process = dpkg_results[dpkg_query]
+    if process['returncode'] == 0:
         result = set()
-        for line in process.stdout.split('\n'):
+        for line in process['stdout'].split('\n'):
             if not line.strip():
                 continue
             pkg, path = line.split(':', 1)
@@ -310,7 +318,7 @@ def guess_dependency(impl, req, version=None, bdep=None,
             log.debug('dependency: found a result with dpkg -S')
             return result.pop() + env_marker_alts
     else:
-        log.debug('dpkg -S did not find package for %s: %s', name, process.stderr)
+        log.debug('dpkg -S did not find package for %s: %s', name, process['stderr'])
 
     pname = sensible_pname(impl, name)
     log.info('Cannot find package that provides %s. '
@@ -321,6 +329,15 @@ def guess_dependency(impl, req, version=None, bdep=None,
     # return pname
 
 
+def dpkg_search_all(dpkg_results):
+    """Run dpkg -S queries collected by guess_dependency at the same time"""
+    queries = sorted(i for i, result in dpkg_results.items() if result is None)
+    if queries:
+        log.debug("invoking dpkg -S %s", ' '.join(queries))
+        outputs = supervisor.run_all(('/usr/bin/dpkg', '-S', i) for i in queries)
+        dpkg_results.update(zip(queries, outputs))
+
+
 def check_environment_marker_restrictions(req, marker_str, impl):
     """Check wither we should include or skip a dependency based on its
     environment markers.
@@ -342,6 +359,7 @@ def check_environment_marker_restrictions(req, marker_str, impl):
     # TODO: Use dynamic values when building arch-dependent
     # binaries, otherwise static values
     # TODO: Hurd values?
+    import platform
     supported_values = {
         'implementation_name': ('cpython', 'pypy'),
         'os_name': ('posix',),
@@ -568,10 +586,11 @@ def parse_requires_dist(impl, fname, bdep=None,
                              options, 'accept_upstream_versions', False))
     result = {'depends': [], 'recommends': [], 'suggests': []}
     section = None
+    import email
     with open(fname, 'r', encoding='utf-8') as fp:
         metadata = email.message_from_string(fp.read())
-    requires = metadata.get_all('Requires-Dist', [])
-    for req in requires:
+    requires = []
+    for req in metadata.get_all('Requires-Dist', []):
         m = EXTRA_RE.search(req)
         result_key = 'depends'
         if m:
@@ -585,7 +604,21 @@ def parse_requires_dist(impl, fname, bdep=None,
                     result_key = 'suggests'
                 else:
                     continue
-        dependency = guess_deps(req=req)
+        requires.append((result_key, req))
+    # requirements that are not in pydist files (and not excluded by
+    # environment markers) need dpkg -S, run all queries at the same time
+    dpkg_results = {}
+    dependencies = []
+    for _, req in requires:
+        queries = {}
+        dependency = guess_deps(req=req, dpkg_results=queries)
+        # requirement deferred to dpkg -S is guessed again once it's done
+        dependencies.append((dependency, bool(queries)))
+        dpkg_results.update(queries)
+    dpkg_search_all(dpkg_results)
+    for (result_key, req), (dependency, deferred) in zip(requires, dependencies):
+        if deferred:
+            dependency = guess_deps(req=req, dpkg_results=dpkg_results)
         if dependency:
             result[result_key].append(dependency)
     return result
@@ -0,0 +1,175 @@
+# Copyright © 2026 dh-python contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+"""Supervisor of external processes.
+
+Commands are started as process groups from an asyncio event loop, so
+independent ones (f.e. probes of all Python versions) can run at the same
+time, with a limit, timeouts and cancellation. If a command fails, times
+out or is cancelled, its whole process group is killed.
+
+asyncio is imported only once a command is executed.
+"""
+
+import logging
+import os
+import shlex
+import signal
+from shutil import which
+from subprocess import DEVNULL, PIPE, TimeoutExpired
+
+log = logging.getLogger('dhpython')
+# characters that need /bin/sh if not quoted
+SHELL_CHARS = frozenset('|&;<>()$`\\*?[]~#\n')
+# seconds between SIGTERM and SIGKILL
+KILL_DELAY = 5
+
+
+def split(command, env=None):
+    """Return argv of a shell command or None if it needs a shell.
+
+    >>> split("python3 -c 'import sys; print(sys.path)'")
+    ['python3', '-c', 'import sys; print(sys.path)']
+    >>> split('ls "foo bar"')
+    ['ls', 'foo bar']
+    >>> split('cd foo && make') is None
+    True
+    >>> split('FOO=1 ls') is None
+    True
+    >>> split('ls *.py') is None
+    True
+    >>> split('echo "$HOME"') is None
+    True
+    """
+    quote = None
+    for char in command:
+        if quote == "'":
+            if char == "'":
+                quote = None
+        elif quote == '"':
+            if char in '$`\\':
+                return None
+            if char == '"':
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char in SHELL_CHARS:
+            return None
+    argv = shlex.split(command)
+    if not argv or '=' in argv[0]:
+        return None
+    # shell builtins, functions, aliases, ...
+    if which(argv[0], path=(env or os.environ).get('PATH', os.defpath)) is None:
+        return None
+    return argv
+
+
+async def run_async(command, *, cwd=None, env=None, timeout=None,
+                    semaphore=None):
+    """Execute a command, return dict with returncode, stdout and stderr
+
+    :param command: list of arguments or shell command (executed without
+        /bin/sh if it doesn't use any of its features, see :func:`split`)
+    :param timeout: seconds, TimeoutExpired is raised once it's exceeded
+    :param semaphore: asyncio.Semaphore limiting number of processes
+    """
+    import asyncio  # pylint: disable=import-outside-toplevel
+    if isinstance(command, str):
+        argv = split(command, env) or ['/bin/sh', '-c', command]
+    else:
+        argv = list(command)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore()
+    async with semaphore:
+        log.debug('invoking: %s', command)
+        process = await asyncio.create_subprocess_exec(
+            *argv, cwd=cwd, env=env, stdin=DEVNULL, stdout=PIPE, stderr=PIPE,
+            start_new_session=True)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(),
+                                                    timeout)
+        except asyncio.TimeoutError:
+            await _terminate(process)
+            raise TimeoutExpired(command, timeout) from None
+        except BaseException:  # cancelled
+            await _terminate(process)
+            raise
+        if process.returncode != 0:
+            # don't leave children of failed commands behind
+            _killpg(process, signal.SIGKILL)
+    return {
+        'returncode': process.returncode,
+        'stdout': str(stdout, 'utf-8'),
+        'stderr': str(stderr, 'utf-8'),
+    }
+
+
+def _killpg(process, sig):
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _terminate(process):
+    import asyncio  # pylint: disable=import-outside-toplevel
+    _killpg(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(asyncio.shield(process.wait()), KILL_DELAY)
+    except asyncio.TimeoutError:
+        pass
+    _killpg(process, signal.SIGKILL)
+    await process.wait()
+
+
+def run_all(commands, *, limit=None, **kwargs):
+    """Execute commands at the same time, return list of results.
+
+    If one of them raises an exception (f.e. TimeoutExpired), the other
+    ones are cancelled (and killed).
+
+    :param limit: max. number of processes running at the same time
+        (default: number of CPUs)
+    :param kwargs: see :func:`run_async`
+    """
+    commands = list(commands)
+    if not commands:
+        return []
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    async def main():
+        semaphore = asyncio.Semaphore(limit or os.cpu_count() or 1)
+        tasks = [asyncio.ensure_future(run_async(i, semaphore=semaphore, **kwargs))
+                 for i in commands]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    return asyncio.run(main())
+
+
+def run(command, **kwargs):
+    """Execute a single command, see :func:`run_async`"""
+    return run_all([command], **kwargs)[0]
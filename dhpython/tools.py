@@ -22,14 +22,20 @@
 import logging
 import os
 import re
+import select
 from datetime import datetime
 from glob import glob
 from pickle import dumps
 from shutil import rmtree
 from os.path import exists, getsize, isdir, islink, join, split
-from subprocess import Popen, PIPE
+from subprocess import Popen
+from tempfile import TemporaryFile
 
 log = logging.getLogger('dhpython')
+# size of the command output's tail kept for error messages
+TAIL_SIZE = 8 * 1024
+# log file extensions, see open_log()
+LOG_SUFFIXES = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
 EGGnPTH_RE = re.compile(r'(.*?)(-py\d\.\d(?:-[^.]*)?)?(\.egg-info|\.pth)$')
 SHAREDLIB_RE = re.compile(r'NEEDED.*libpython(\d\.\d)')
 
@@ -133,11 +139,10 @@ def so2pyver(fpath):
     :returns: Python version
     """
 
-    cmd = "readelf -Wd '%s'" % fpath
-    with Popen(cmd, stdout=PIPE, shell=True) as process:
-        match = SHAREDLIB_RE.search(str(process.stdout.read(), encoding="UTF-8"))
-        if match:
-            return Version(match.groups()[0])
+    output = supervisor.run(('readelf', '-Wd', fpath))
+    match = SHAREDLIB_RE.search(output['stdout'])
+    if match:
+        return Version(match.groups()[0])
 
 
 def clean_egg_name(name):
@@ -203,42 +208,187 @@ def remove_ns(interpreter, package, namespaces, versions):
     return result
 
 
-def execute(command, cwd=None, env=None, log_output=None, shell=True):
+def execute(command, cwd=None, env=None, log_output=None, shell=True, *,
+            pass_fds=()):
     """Execute external shell command.
 
     :param cdw: current working directory
     :param env: environment
     :param log_output:
-        * opened log file or path to this file, or
+        * opened log file or path to this file (see :func:`open_log`), or
         * None if output should be included in the returned dict, or
         * False if output should be redirected to stdout/stderr
+    :param shell: execute command via /bin/sh (if it needs it, see
+        :func:`dhpython.supervisor.split`)
+    :param pass_fds: file descriptors to keep open in the child
+    :return: dict with returncode, stdout, stderr, resources (see
+        :func:`wait`) and tail (last TAIL_SIZE bytes of output written to
+        the log file given by its path) keys
     """
-    args = {'shell': shell, 'cwd': cwd, 'env': env}
-    close = False
+    argv = shell and isinstance(command, str) and supervisor.split(command, env)
+    args = {'args': argv or command, 'shell': shell and not argv, 'cwd': cwd,
+            'env': env, 'pass_fds': pass_fds}
+    close = []
+    pipe = None
+    header = '\n# command executed on {}\n$ {}\n'.format(
+        datetime.now().isoformat(), command)
     if log_output is False:
         pass
     elif log_output is None:
-        args.update(stdout=PIPE, stderr=PIPE)
+        # pylint: disable=consider-using-with
+        out, err = TemporaryFile(), TemporaryFile()
+        close.extend((out, err))
+        args.update(stdout=out, stderr=err)
+    elif isinstance(log_output, str):
+        # output is passed through pybuild, it's compressed and its tail is
+        # kept for error messages
+        log_output = open_log(log_output)
+        close.append(log_output)
+        log_output.write(header.encode('utf-8'))
+        pipe = list(os.pipe())
+        args.update(stdout=pipe[1], stderr=pipe[1])
     elif log_output:
-        if isinstance(log_output, str):
-            close = True
-            # pylint: disable=consider-using-with
-            log_output = open(log_output, 'a', encoding='utf-8')
-        log_output.write('\n# command executed on {}'.format(datetime.now().isoformat()))
-        log_output.write('\n$ {}\n'.format(command))
+        log_output.write(header)
         log_output.flush()
         args.update(stdout=log_output, stderr=log_output)
 
     log.debug('invoking: %s', command)
-    with Popen(command, **args) as process:
-        stdout, stderr = process.communicate()
-        if close:
-            log_output.close()
+    tail = None
+    try:
+        with Popen(**args) as process:
+            if pipe:
+                os.close(pipe.pop())
+                # don't reap the process, see wait()
+                tail = pump(pipe[0], log_output, lambda: os.waitid(
+                    os.P_PID, process.pid,
+                    os.WEXITED | os.WNOHANG | os.WNOWAIT) is not None)
+            resources = wait(process)
+        stdout = stderr = None
+        if log_output is None:
+            out.seek(0)
+            err.seek(0)
+            stdout, stderr = out.read(), err.read()
         return {
             "returncode": process.returncode,
             "stdout": stdout is not None and str(stdout, 'utf-8'),
             "stderr": stderr is not None and str(stderr, 'utf-8'),
+            "resources": resources,
+            "tail": tail and tail.decode('utf-8', 'replace'),
         }
+    finally:
+        # write end is closed right after the child is started
+        for fd in pipe or ():
+            os.close(fd)
+        for fp in close:
+            fp.close()
+
+
+def open_log(fpath):
+    """Open log file for appending (in binary mode).
+
+    Files with .gz or .zst extension are compressed. Each call starts a new
+    gzip member or zstd frame, so content appended since given (compressed)
+    size can be read on its own, see :func:`read_log`.
+    """
+    if fpath.endswith('.gz'):
+        import gzip  # pylint: disable=import-outside-toplevel
+        # fast compression, logs are written while the build runs
+        return gzip.open(fpath, 'ab', compresslevel=1)
+    if fpath.endswith('.zst'):
+        zstd = zstd_module()
+        if zstd.__name__ == 'zstandard':
+            # pylint: disable=consider-using-with
+            return zstd.ZstdCompressor().stream_writer(open(fpath, 'ab'))
+        return zstd.open(fpath, 'ab')
+    return open(fpath, 'ab')
+
+
+def read_log(fpath, offset=0):
+    """Return text of a log file written by :func:`open_log`
+
+    :param offset: (compressed) size of the file to skip
+    """
+    with open(fpath, 'rb') as fp:
+        fp.seek(offset)
+        if fpath.endswith('.gz'):
+            import gzip  # pylint: disable=import-outside-toplevel
+            data = gzip.GzipFile(fileobj=fp).read()
+        elif fpath.endswith('.zst'):
+            zstd = zstd_module()
+            if zstd.__name__ == 'zstandard':
+                data = zstd.ZstdDecompressor().stream_reader(
+                    fp, read_across_frames=True).read()
+            else:
+                data = zstd.decompress(fp.read())
+        else:
+            data = fp.read()
+    return data.decode('utf-8', 'replace')
+
+
+def zstd_module():
+    """Return compression.zstd (Python >= 3.14) or zstandard module"""
+    # pylint: disable=import-outside-toplevel
+    try:
+        from compression import zstd
+    except ImportError:
+        import zstandard as zstd
+    return zstd
+
+
+def pump(fd, dst, exited, tail_size=TAIL_SIZE):
+    """Copy output of a process from fd to dst, return its tail.
+
+    Copying stops once the pipe is closed or, if there's nothing to read,
+    once exited() returns True (pipe can be kept open by daemons started
+    by tests).
+    """
+    tail = bytearray()
+    poller = select.poll()
+    poller.register(fd, select.POLLIN)
+    while True:
+        if not poller.poll(500):
+            if not exited():
+                continue
+            os.set_blocking(fd, False)
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            break
+        if not data:
+            break
+        dst.write(data)
+        tail += data
+        del tail[:-tail_size]
+    return bytes(tail)
+
+
+def wait(process):
+    """Wait for the process to finish, return resources it used.
+
+    Unlike getrusage(RUSAGE_CHILDREN) deltas, numbers are not mixed up with
+    other commands executed at the same time (see pybuild --jobs). They
+    include children of the process.
+
+    :return: dict with utime and stime (in seconds), maxrss (peak resident
+        set size of the biggest process, in KiB), read_bytes and
+        write_bytes (storage I/O) keys
+    """
+    resources = {}
+    # I/O counters are gone once the child is reaped
+    os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+    try:
+        with open('/proc/{}/io'.format(process.pid), encoding='ascii') as fp:
+            for line in fp:
+                key, value = line.split(':', 1)
+                if key in ('read_bytes', 'write_bytes'):
+                    resources[key] = int(value)
+    except OSError:
+        pass
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    resources.update(utime=rusage.ru_utime, stime=rusage.ru_stime,
+                     maxrss=rusage.ru_maxrss)
+    return resources
 
 
 class memoize:
@@ -340,6 +490,7 @@ def pyremove(interpreter, package, vrange):
                         else:
                             os.remove(fpath)
 
+from dhpython import supervisor
 from dhpython.interpreter import Interpreter
 from dhpython.version import Version, get_requested_versions, RANGE_PATTERN
 INSTALL_RE = re.compile(r"""
@@ -0,0 +1,47 @@
+from tempfile import TemporaryDirectory
+import os
+import unittest
+
+from dhpython.build.cache import WheelCache
+
+
+class TestWheelCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = WheelCache(self.tmppath('cache'), max_size=10)
+        os.mkdir(self.tmppath('home'))
+
+    def tmppath(self, *path):
+        return os.path.join(self.tmpdir.name, *path)
+
+    def wheel(self, name, size=4):
+        fpath = self.tmppath(name)
+        with open(fpath, 'wb') as fp:
+            fp.write(b'x' * size)
+        return fpath
+
+    def test_miss(self):
+        self.assertIsNone(self.cache.get('key', self.tmppath('home')))
+
+    def test_hit(self):
+        self.cache.put('key', self.wheel('foo-1.0-py3-none-any.whl'))
+        wheel = self.cache.get('key', self.tmppath('home'))
+        self.assertEqual(wheel, self.tmppath('home', 'foo-1.0-py3-none-any.whl'))
+        self.assertTrue(os.path.exists(wheel))
+
+    def test_key(self):
+        self.assertEqual(WheelCache.key({'a': 1, 'b': 2}),
+                         WheelCache.key({'b': 2, 'a': 1}))
+        self.assertNotEqual(WheelCache.key({'a': 1}), WheelCache.key({'a': 2}))
+
+    def test_lru_eviction(self):
+        self.cache.put('key1', self.wheel('foo-1.0-py3-none-any.whl'))
+        self.cache.put('key2', self.wheel('bar-1.0-py3-none-any.whl'))
+        os.utime(self.tmppath('cache', 'key1'), (1, 1))
+        os.utime(self.tmppath('cache', 'key2'), (2, 2))
+        self.cache.get('key1', self.tmppath('home'))
+        self.cache.put('key3', self.wheel('baz-1.0-py3-none-any.whl'))
+        self.assertIsNotNone(self.cache.get('key1', self.tmppath('home')))
+        self.assertIsNone(self.cache.get('key2', self.tmppath('home')))
+        self.assertIsNotNone(self.cache.get('key3', self.tmppath('home')))
@@ -0,0 +1,38 @@
+from tempfile import TemporaryDirectory
+import os
+import unittest
+
+from dhpython.build.base import clean_tree
+
+
+class TestCleanTree(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmpdir.cleanup)
+        for path in ('foo/__init__.py', 'foo/__pycache__/__init__.cpython-311.pyc',
+                     'foo/bar/baz.pyc', 'foo.egg-info/PKG-INFO',
+                     'foo.egg-info/SOURCES.txt', '.git/hooks/x.pyc',
+                     '.pybuild/cpython3_3.11/build/foo/x.pyc'):
+            self.write(path)
+
+    def write(self, path):
+        fpath = os.path.join(self.tmpdir.name, path)
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        with open(fpath, 'w', encoding='utf-8'):
+            pass
+
+    def files(self):
+        return sorted(os.path.relpath(os.path.join(root, fn), self.tmpdir.name)
+                      for root, _, file_names in os.walk(self.tmpdir.name)
+                      for fn in file_names)
+
+    def test_clean(self):
+        clean_tree(self.tmpdir.name)
+        self.assertEqual(self.files(), [
+            '.git/hooks/x.pyc', '.pybuild/cpython3_3.11/build/foo/x.pyc',
+            'foo/__init__.py'])
+
+    def test_keep_sources_txt(self):
+        clean_tree(self.tmpdir.name, keep_sources_txt=True)
+        self.assertIn('foo.egg-info/SOURCES.txt', self.files())
+        self.assertNotIn('foo.egg-info/PKG-INFO', self.files())
@@ -2,7 +2,7 @@ from tempfile import TemporaryDirectory
 import unittest
 import os
 
-from dhpython.debhelper import DebHelper, build_options
+from dhpython.debhelper import DebHelper, build_depends, build_options
 
 
 class DebHelperTestCase(unittest.TestCase):
@@ -181,3 +181,14 @@ class TestRemainingPackages(DebHelperTestCase):
     def test_skips_logged_packages(self):
         self.assertEqual(list(self.dh.packages.keys()),
                          ['python3-foo-ext', 'foo', 'recfoo'])
+
+
+class TestBuildDepends(DebHelperTestCase):
+    control = CONTROL
+    parse_control = False
+
+    def test_parsed_once(self):
+        deps = build_depends()
+        self.assertIn('python3-all', deps)
+        os.remove('debian/control')
+        self.assertIs(build_depends(), deps)
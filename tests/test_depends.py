@@ -5,7 +5,9 @@ import unittest
 from copy import deepcopy
 from pickle import dumps
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
+from dhpython import pydist
 from dhpython.depends import Dependencies
 
 from .common import FakeOptions
@@ -648,6 +650,45 @@ class TestEnvironmentMarkersEggInfo(TestEnvironmentMarkersDistInfo):
         raise unittest.SkipTest('Not possible in requires.txt')
 
 
+class TestDpkgSearchDistInfo(DependenciesTestCase):
+    options = FakeOptions(guess_deps=True)
+    pydist = {
+        'bar': 'python3-bar',
+    }
+    dist_info_metadata = {
+        'debian/foo/usr/lib/python3/dist-packages/foo.dist-info/METADATA': (
+            'Requires-Dist: bar',
+            'Requires-Dist: unused-win-module ; (sys_platform == "win32")',
+            'Requires-Dist: quux',
+            'Requires-Dist: Quux >= 1.0 ; extra == "feature"',
+        ),
+    }
+    parse = False
+
+    def test_only_fallback_queries(self):
+        queries = []
+
+        def run_all(commands, **kwargs):  # pylint: disable=unused-argument
+            commands = list(commands)
+            queries.extend(i[2] for i in commands)
+            return [{'returncode': 0, 'stderr': '', 'stdout':
+                     'python3-quux: /usr/lib/python3/dist-packages/quux-1.0.dist-info\n'}
+                    for _ in commands]
+
+        with patch('dhpython.supervisor.run_all', run_all), \
+                patch('dhpython.supervisor.run') as run, \
+                patch('dhpython.pydist.guess_dependency',
+                      wraps=pydist.guess_dependency) as guess:
+            self.d.parse(self.prepared_stats, self.options)
+        run.assert_not_called()
+        self.assertEqual(queries, ['*python3/*/[Qq][Uu][Uu][Xx]-?*.*-info'])
+        # only the requirement that needed dpkg -S is guessed again
+        self.assertEqual([i.kwargs['req'].split(' ')[0] for i in guess.call_args_list],
+                         ['bar', 'unused-win-module', 'quux', 'quux'])
+        self.assertIn('python3-bar', self.d.depends)
+        self.assertIn('python3-quux', self.d.depends)
+
+
 class TestIgnoresUnusedModulesDistInfo(DependenciesTestCase):
     options = FakeOptions(guess_deps=True, depends_section=['feature'])
     dist_info_metadata = {
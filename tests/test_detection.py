@@ -0,0 +1,59 @@
+import json
+import os
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+from dhpython.build import detection
+
+
+class TestDetectionCache(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = self.tempdir.name
+        self.fpath = join(self.path, '.pybuild', 'detect.json')
+        with open(join(self.path, 'setup.py'), 'w', encoding='utf-8') as fp:
+            fp.write('')
+
+    def key(self):
+        return detection.cache_key(self.path, None)
+
+    def test_not_created(self):
+        detection.save(self.key(), 'distutils', 60, {}, fpath=self.fpath)
+        self.assertFalse(os.path.exists(self.fpath))
+
+    def test_load(self):
+        os.mkdir(join(self.path, '.pybuild'))
+        detection.save(self.key(), 'distutils', 60, {'setup_py': 'setup.py'},
+                       fpath=self.fpath)
+        self.assertEqual(detection.load(self.key(), fpath=self.fpath),
+                         {'plugin': 'distutils', 'certainty': 60,
+                          'args': {'setup_py': 'setup.py'}})
+
+    def test_invalidated(self):
+        os.mkdir(join(self.path, '.pybuild'))
+        detection.save(self.key(), 'distutils', 60, {}, fpath=self.fpath)
+        with open(join(self.path, 'pyproject.toml'), 'w', encoding='utf-8') as fp:
+            fp.write('')
+        self.assertIsNone(detection.load(self.key(), fpath=self.fpath))
+
+    def test_listing(self):
+        os.mkdir(join(self.path, '.pybuild'))
+        detection.save(self.key(), 'distutils', 60, {}, fpath=self.fpath)
+        os.mkdir(join(self.path, 'foo.egg-info'))
+        self.assertIsNone(detection.load(self.key(), fpath=self.fpath))
+
+    def test_commands(self):
+        os.mkdir(join(self.path, '.pybuild'))
+        detection.save(self.key(), 'distutils', 60, {}, fpath=self.fpath)
+        with open(self.fpath, encoding='utf-8') as fp:
+            entries = json.load(fp)
+        for entry in entries.values():
+            entry['commands'] = {'no-such-command': True}
+        with open(self.fpath, 'w', encoding='utf-8') as fp:
+            json.dump(entries, fp)
+        self.assertIsNone(detection.load(self.key(), fpath=self.fpath))
+
+    def test_scan(self):
+        self.assertEqual(detection.scan(self.path), ['setup.py'])
@@ -0,0 +1,102 @@
+from tempfile import TemporaryDirectory
+import json
+import os
+import shlex
+import subprocess
+import sys
+import unittest
+
+from dhpython.build.failures import (
+    LASTFAILED, FailedTests, cache_option, last_failed)
+
+
+class TestFailedTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmpdir.cleanup)
+        self.fpath = os.path.join(self.tmpdir.name, '.pybuild', 'failed_tests.json')
+        self.failed_tests = FailedTests(self.fpath)
+
+    def build_dir(self, version, failed=None):
+        path = os.path.join(self.tmpdir.name, 'build_' + version)
+        if failed is not None:
+            fpath = os.path.join(path, LASTFAILED)
+            os.makedirs(os.path.dirname(fpath), exist_ok=True)
+            with open(fpath, 'w', encoding='utf-8') as fp:
+                json.dump(dict.fromkeys(failed, True), fp)
+        return path
+
+    def test_no_cache(self):
+        self.assertIsNone(last_failed(self.build_dir('3.12')))
+        self.failed_tests.record('src', '3.12', self.build_dir('3.12'))
+        self.assertFalse(os.path.exists(self.fpath))
+
+    def test_seed_other_versions(self):
+        self.failed_tests.record(
+            'src', '3.12', self.build_dir('3.12', ['t.py::test_a', 't.py::test_b']))
+        self.failed_tests.record('other', '3.12', self.build_dir('3.12', ['x.py::test']))
+        build_dir = self.build_dir('3.13', ['t.py::test_c'])
+        self.assertEqual(self.failed_tests.seed('src', '3.13', build_dir),
+                         ['t.py::test_a', 't.py::test_b'])
+        self.assertEqual(last_failed(build_dir),
+                         ['t.py::test_a', 't.py::test_b', 't.py::test_c'])
+
+    def test_seed_own_version(self):
+        self.failed_tests.record('src', '3.12', self.build_dir('3.12', ['t.py::test_a']))
+        self.assertEqual(self.failed_tests.seed('src', '3.12', self.build_dir('3.12')), [])
+
+    def test_fixed(self):
+        self.failed_tests.record('src', '3.12', self.build_dir('3.12', ['t.py::test_a']))
+        self.failed_tests.record('src', '3.12', self.build_dir('3.12', []))
+        build_dir = self.build_dir('3.13')
+        self.assertEqual(self.failed_tests.seed('src', '3.13', build_dir), [])
+        self.assertIsNone(last_failed(build_dir))
+
+    def test_not_writable(self):
+        # parent of the file is not a directory
+        fpath = os.path.join(self.tmpdir.name, 'file')
+        open(fpath, 'w', encoding='utf-8').close()  # pylint: disable=consider-using-with
+        failed_tests = FailedTests(os.path.join(fpath, 'failed_tests.json'))
+        failed_tests.record('src', '3.12', self.build_dir('3.12', ['t.py::test_a']))
+        self.failed_tests.record('src', '3.12', self.build_dir('3.12'))
+        self.assertEqual(self.failed_tests.seed('src', '3.13', fpath), [])
+
+
+class TestCacheOption(unittest.TestCase):
+    def setUp(self):
+        try:
+            import pytest  # pylint: disable=import-outside-toplevel,unused-import
+        except ImportError:
+            self.skipTest('pytest is not available')
+        self.tmpdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmpdir.cleanup)
+        # tox.ini in the source directory makes it pytest's rootdir
+        with open(os.path.join(self.tmpdir.name, 'tox.ini'), 'w', encoding='utf-8') as fp:
+            fp.write('[pytest]\n')
+
+    def run_pytest(self, version, *options):
+        build_dir = os.path.join(self.tmpdir.name, '.pybuild', 'cpython3_' + version, 'build')
+        os.makedirs(build_dir, exist_ok=True)
+        with open(os.path.join(build_dir, 'test_foo.py'), 'w', encoding='utf-8') as fp:
+            fp.write('def test_ok():\n    pass\n\n'
+                     'def test_fail():\n    assert False\n')
+        process = subprocess.run(
+            [sys.executable, '-m', 'pytest', '-v', '-p', 'no:xdist', *options]
+            + shlex.split(cache_option(build_dir)),
+            cwd=build_dir, stdout=subprocess.PIPE, text=True, check=False)
+        return build_dir, process.stdout
+
+    def test_rootdir_outside_build_dir(self):
+        build_dir, _ = self.run_pytest('3.12')
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir.name, '.pytest_cache')))
+        self.assertEqual(last_failed(build_dir),
+                         ['.pybuild/cpython3_3.12/build/test_foo.py::test_fail'])
+
+        failed_tests = FailedTests(os.path.join(self.tmpdir.name, 'failed_tests.json'))
+        failed_tests.record('src', '3.12', build_dir)
+        build_dir = os.path.join(self.tmpdir.name, '.pybuild', 'cpython3_3.13', 'build')
+        self.assertEqual(failed_tests.seed('src', '3.13', build_dir),
+                         ['.pybuild/cpython3_3.13/build/test_foo.py::test_fail'])
+        _, output = self.run_pytest('3.13', '--failed-first')
+        # test_fail is the first one, even though it's defined after test_ok
+        self.assertLess(output.index('test_fail'), output.index('test_ok'))
@@ -0,0 +1,95 @@
+import os
+from os.path import dirname, join
+from statistics import median
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+import unittest
+
+ROOT = dirname(dirname(os.path.abspath(__file__)))
+
+# Import time budget, as a multiple of plain interpreter startup
+# (`python3 -X importtime -c pass`, median of RUNS). Timings are unreliable
+# on loaded machines, it's checked only if DH_PYTHON_TIMING_TESTS is set.
+# Raise it only together with a justification in the commit message.
+BUDGET = {
+    'pybuild --detect': 8,
+    'dh_python3 --help': 10,
+}
+RUNS = 5
+
+
+def importtime(*args, cwd=None):
+    """Return {module: self time in µs} reported by python3 -X importtime"""
+    process = subprocess.run(
+        (sys.executable, '-X', 'importtime') + args, cwd=cwd, check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, encoding='utf-8')
+    result = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, _, name = line[12:].split('|')
+        result[name.strip()] = int(self_time)
+    return result
+
+
+def total(*args, cwd=None):
+    return median(sum(importtime(*args, cwd=cwd).values()) for _ in range(RUNS))
+
+
+class TestImportTime(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = self.tempdir.name
+        os.mkdir(join(self.path, '.pybuild'))
+        with open(join(self.path, 'setup.py'), 'w', encoding='utf-8') as fp:
+            fp.write('')
+        self.pybuild = (join(ROOT, 'pybuild'), '--system=distutils', '--detect')
+        self.dh_python3 = (join(ROOT, 'dh_python3'), '--help')
+
+    def test_selected_plugin(self):
+        modules = importtime(*self.pybuild, cwd=self.path)
+        self.assertIn('dhpython.build.plugin_distutils', modules)
+        self.assertNotIn('dhpython.build.plugin_pyproject', modules)
+        self.assertNotIn('dhpython.build.plugin_cmake', modules)
+        # needed only by steps
+        self.assertNotIn('dhpython.build.trash', modules)
+
+    def test_cached_detection(self):
+        importtime(*self.pybuild, cwd=self.path)
+        modules = importtime(*self.pybuild, cwd=self.path)
+        self.assertNotIn('dhpython.build.base', modules)
+        self.assertNotIn('dhpython.debhelper', modules)
+
+    def test_cached_print(self):
+        os.mkdir(join(self.path, 'debian'))
+        with open(join(self.path, 'debian', 'control'), 'w', encoding='utf-8') as fp:
+            fp.write('Source: foo\nBuild-Depends: python3-all\n\n'
+                     'Package: python3-foo\nArchitecture: all\n')
+        # debhelper's --detect and rules' --print share the cache
+        importtime(join(ROOT, 'pybuild'), '--detect', cwd=self.path)
+        modules = importtime(join(ROOT, 'pybuild'), '--print', 'build_dir',
+                             '--interpreter', 'python3', cwd=self.path)
+        self.assertIn('dhpython.build.plugin_distutils', modules)
+        self.assertNotIn('dhpython.build.plugin_pyproject', modules)
+        self.assertNotIn('dhpython.build.plugin_cmake', modules)
+
+    def test_dh_python3(self):
+        modules = importtime(*self.dh_python3)
+        self.assertNotIn('dhpython.pydist', modules)
+        self.assertNotIn('email', modules)
+
+    @unittest.skipUnless(os.environ.get('DH_PYTHON_TIMING_TESTS'),
+                         'DH_PYTHON_TIMING_TESTS is not set')
+    def test_budget(self):
+        startup = total('-c', 'pass')
+        importtime(*self.pybuild, cwd=self.path)  # fill detection cache
+        for name, args in (('pybuild --detect', self.pybuild),
+                           ('dh_python3 --help', self.dh_python3)):
+            cost = total(*args, cwd=self.path)
+            with self.subTest(name):
+                self.assertLessEqual(
+                    cost, startup * BUDGET[name],
+                    '{}: {} µs of imports, budget is {} x {} µs'.format(
+                        name, cost, BUDGET[name], startup))
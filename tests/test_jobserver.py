@@ -0,0 +1,27 @@
+import os
+import unittest
+
+from dhpython.build.jobserver import Jobserver
+
+
+class TestJobserver(unittest.TestCase):
+    def setUp(self):
+        self.read_fd, self.write_fd = os.pipe()
+        self.addCleanup(os.close, self.read_fd)
+        self.addCleanup(os.close, self.write_fd)
+        os.write(self.write_fd, b'++')
+
+    def test_tokens(self):
+        jobserver = Jobserver.from_makeflags(
+            ' -j3 --jobserver-auth={},{}'.format(self.read_fd, self.write_fd))
+        self.assertEqual(jobserver.jobs, 3)
+        self.assertEqual(jobserver.fds, (self.read_fd, self.write_fd))
+        tokens = jobserver.acquire_many(5)
+        self.assertEqual(tokens, [b'+', b'+'])
+        self.assertIsNone(jobserver.acquire(timeout=0.01))
+        jobserver.release(*tokens)
+        self.assertEqual(jobserver.acquire(), b'+')
+
+    def test_unavailable(self):
+        self.assertIsNone(Jobserver.from_makeflags('-j4'))
+        self.assertIsNone(Jobserver.from_makeflags('--jobserver-auth=1000,1001'))
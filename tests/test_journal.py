@@ -0,0 +1,103 @@
+from tempfile import TemporaryDirectory
+import os
+import unittest
+
+from dhpython.build.journal import Journal, tree_hash
+
+
+class TestTreeHash(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmpdir.cleanup)
+        self.write('foo.py')
+        self.hash = tree_hash(self.tmpdir.name)
+
+    def write(self, *path, content='x'):
+        fpath = os.path.join(self.tmpdir.name, *path)
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        with open(fpath, 'w', encoding='utf-8') as fp:
+            fp.write(content)
+
+    def test_unchanged(self):
+        self.assertEqual(self.hash, tree_hash(self.tmpdir.name))
+
+    def test_new_file(self):
+        self.write('bar.py')
+        self.assertNotEqual(self.hash, tree_hash(self.tmpdir.name))
+
+    def test_ignores_build_artefacts(self):
+        self.write('__pycache__', 'foo.cpython-311.pyc')
+        self.write('.pybuild', 'cpython3_3.11', 'build', 'foo.py')
+        self.write('debian', 'python3-foo', 'usr', 'foo.py')
+        self.write('foo.egg-info', 'PKG-INFO')
+        self.assertEqual(self.hash, tree_hash(self.tmpdir.name))
+
+    def test_debian_patches(self):
+        self.write('debian', 'patches', 'series')
+        self.assertNotEqual(self.hash, tree_hash(self.tmpdir.name))
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmpdir.cleanup)
+        self.fpath = os.path.join(self.tmpdir.name, '.pybuild', 'journal.json')
+        self.journal = Journal(self.fpath)
+
+    def complete(self, journal, step, data='data'):
+        fingerprint = journal.fingerprint(step, 'home', data)
+        journal.start(step, 'home')
+        journal.done(step, 'home', fingerprint)
+        return fingerprint
+
+    def test_done(self):
+        fingerprint = self.complete(self.journal, 'build')
+        self.assertTrue(self.journal.is_done('build', 'home', fingerprint))
+        self.assertFalse(self.journal.is_done('build', 'other_home', fingerprint))
+
+    def test_persistent(self):
+        fingerprint = self.complete(self.journal, 'build')
+        journal = Journal(self.fpath)
+        self.assertTrue(journal.is_done('build', 'home', fingerprint))
+
+    def test_changed_input(self):
+        self.complete(self.journal, 'build')
+        fingerprint = self.journal.fingerprint('build', 'home', 'other data')
+        self.assertFalse(self.journal.is_done('build', 'home', fingerprint))
+
+    def test_started_not_done(self):
+        fingerprint = self.complete(self.journal, 'build')
+        self.journal.start('build', 'home')
+        self.assertFalse(self.journal.is_done('build', 'home', fingerprint))
+
+    def test_rerun_invalidates_next_step(self):
+        self.complete(self.journal, 'build')
+        self.complete(self.journal, 'install')
+        self.complete(self.journal, 'build')
+        fingerprint = self.journal.fingerprint('install', 'home', 'data')
+        self.assertFalse(self.journal.is_done('install', 'home', fingerprint))
+
+    def test_source_written_by_step(self):
+        source_dir = os.path.join(self.tmpdir.name, 'src')
+        os.makedirs(source_dir)
+        with open(os.path.join(source_dir, 'foo.pyx'), 'w', encoding='utf-8') as fp:
+            fp.write('x')
+        source = self.journal.source_hash(source_dir)
+        fingerprint = self.journal.fingerprint('build', 'home', source)
+        self.journal.start('build', 'home')
+        # f.e. Cython writes generated .c files next to .pyx ones
+        with open(os.path.join(source_dir, 'foo.c'), 'w', encoding='utf-8') as fp:
+            fp.write('x')
+        self.journal.done('build', 'home', fingerprint, source_dir)
+
+        journal = Journal(self.fpath)
+        source = journal.source_hash(source_dir)
+        fingerprint = journal.fingerprint('build', 'home', source)
+        self.assertTrue(journal.is_done('build', 'home', fingerprint))
+
+        # changes made after the last step invalidate it
+        with open(os.path.join(source_dir, 'foo.pyx'), 'a', encoding='utf-8') as fp:
+            fp.write('y')
+        source = Journal(self.fpath).source_hash(source_dir)
+        fingerprint = journal.fingerprint('build', 'home', source)
+        self.assertFalse(journal.is_done('build', 'home', fingerprint))
@@ -0,0 +1,31 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+from dhpython.build.memory import HISTORY_SIZE, MemoryHistory
+
+
+class TestMemoryHistory(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tempdir.cleanup)
+        self.fpath = join(self.tempdir.name, 'cache', 'memory.json')
+
+    def test_predict(self):
+        history = MemoryHistory(self.fpath, 'foo')
+        self.assertEqual(history.predict('build'), 0)
+        history.record('build', 2048)
+        history.record('build', 1024)
+        history.record('test', None)
+        self.assertEqual(history.predict('build'), 2048 * 1024)
+        self.assertEqual(history.predict('test'), 0)
+        # shared with other processes, separated by source
+        self.assertEqual(MemoryHistory(self.fpath, 'foo').predict('build'), 2048 * 1024)
+        self.assertEqual(MemoryHistory(self.fpath, 'bar').predict('build'), 0)
+
+    def test_recent_builds_only(self):
+        history = MemoryHistory(self.fpath, 'foo')
+        history.record('build', 4096)
+        for _ in range(HISTORY_SIZE):
+            history.record('build', 1024)
+        self.assertEqual(history.predict('build'), 1024 * 1024)
@@ -0,0 +1,84 @@
+from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from tempfile import TemporaryDirectory
+from zipfile import ZipFile
+import os
+import sys
+import unittest
+
+from dhpython.interpreter import Interpreter
+
+MODULES = 20
+
+
+@unittest.skipUnless(find_spec('build') and find_spec('installer')
+                     and find_spec('wheel'), 'build, installer or wheel is not available')
+class TestConcurrentBuilds(unittest.TestCase):
+    """Two versions built from one source tree at the same time"""
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmpdir.cleanup)
+        self.src = os.path.join(self.tmpdir.name, 'src')
+        self.write('pyproject.toml', '[build-system]\nrequires = []\n'
+                   'build-backend = "setuptools.build_meta"\n')
+        self.write('setup.py', 'from setuptools import setup\n'
+                   'setup(name="foo", version="1.0", packages=["foo"])\n')
+        for i in range(MODULES):
+            self.write('foo/mod{}.py'.format(i), 'X = {}\n'.format(i))
+        self.write('foo/__init__.py', '')
+
+    def write(self, path, content):
+        fpath = os.path.join(self.src, path)
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        with open(fpath, 'w', encoding='utf-8') as fp:
+            fp.write(content)
+
+    def args(self, name, **kwargs):
+        home_dir = os.path.join(self.tmpdir.name, '.pybuild', name)
+        os.makedirs(os.path.join(home_dir, 'build'))
+        # written by previous steps
+        with open(os.path.join(home_dir, '.pydistutils.cfg'), 'w',
+                  encoding='utf-8'):
+            pass
+        version = '{}.{}'.format(*sys.version_info[:2])
+        return dict(kwargs, dir=self.src, home_dir=home_dir, args='',
+                    build_dir=os.path.join(home_dir, 'build'), ENV={},
+                    interpreter=Interpreter('python' + version),
+                    version=version)
+
+    def build(self, plugin, args):
+        context = {'ENV': dict(os.environ), 'dir': self.src, 'args': {},
+                   'compile_jobs': 1}
+        plugin.build_wheel(context, args)
+        return plugin.built_wheel(context, args)
+
+    def check(self, plugin, **kwargs):
+        units = [self.args('cpython3_a', **kwargs),
+                 self.args('cpython3_b', **kwargs)]
+        with ThreadPoolExecutor(len(units)) as executor:
+            wheels = list(executor.map(lambda i: self.build(plugin, i), units))
+        for wheel in wheels:
+            with ZipFile(wheel) as zf:
+                names = zf.namelist()
+            self.assertEqual(len([i for i in names if i.startswith('foo/mod')]),
+                             MODULES)
+        # nothing is shared by versions in the source tree
+        self.assertEqual(sorted(os.listdir(self.src)),
+                         ['foo', 'pyproject.toml', 'setup.py'])
+
+    def cfg(self):
+        return Namespace(quiet=True, really_quiet=False, log_compression='gzip',
+                         worker=False, reuse_wheel=False, compress_wheel=False,
+                         compile_jobs=1)
+
+    def test_pyproject(self):
+        from dhpython.build.plugin_pyproject import BuildSystem
+        plugin = BuildSystem(self.cfg())
+        plugin._backend = 'setuptools.build_meta'
+        self.check(plugin)
+
+    def test_distutils(self):
+        from dhpython.build.plugin_distutils import BuildSystem
+        self.check(BuildSystem(self.cfg()), setup_py='setup.py')
@@ -0,0 +1,39 @@
+from argparse import Namespace
+from tempfile import TemporaryDirectory
+import os
+import unittest
+
+from dhpython.build.plugin_pyproject import BuildSystem
+
+
+class TestCompileJobs(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmpdir.cleanup)
+        self.plugin = BuildSystem(Namespace(compile_jobs=1))
+        self.plugin._backend = 'setuptools.build_meta'
+        self.cfg_path = os.path.join(self.tmpdir.name, '.pydistutils.cfg')
+
+    def settings(self, jobs, env=None):
+        context = {'ENV': env or {}, 'compile_jobs': jobs}
+        args = {'dir': self.tmpdir.name, 'home_dir': self.tmpdir.name, 'ENV': {}}
+        self.plugin._compile_jobs_settings(context, args)
+        return context, args
+
+    def test_parallel(self):
+        context, args = self.settings(4)
+        with open(self.cfg_path, encoding='utf-8') as fp:
+            self.assertIn('parallel=4', fp.read())
+        self.assertEqual(args['ENV'], {'CMAKE_BUILD_PARALLEL_LEVEL': '4'})
+        self.assertEqual(context['ENV'], {})
+
+    def test_jobs_changed(self):
+        self.settings(4)
+        _, args = self.settings(1)
+        with open(self.cfg_path, encoding='utf-8') as fp:
+            self.assertNotIn('parallel', fp.read())
+        self.assertEqual(args['ENV'], {})
+
+    def test_env_set_by_user(self):
+        _, args = self.settings(4, {'CMAKE_BUILD_PARALLEL_LEVEL': '2'})
+        self.assertEqual(args['ENV'], {})
@@ -0,0 +1,50 @@
+import os
+from os.path import join
+import pstats
+from tempfile import TemporaryDirectory
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+from dhpython.profiling import Phases, profiled
+
+
+class TestProfiled(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = self.tempdir.name
+
+    def run_profiled(self, mode):
+        env = {'DH_PYTHON_PROFILE': mode, 'DH_PYTHON_PROFILE_DIR': self.path}
+        with patch.dict(os.environ, env):
+            with profiled('test'):
+                sorted(range(1000))
+        return join(self.path, 'test-{}'.format(os.getpid()))
+
+    def test_cprofile(self):
+        fpath = self.run_profiled('cprofile') + '.prof'
+        self.assertTrue(pstats.Stats(fpath).total_calls)
+
+    def test_tracemalloc(self):
+        fpath = self.run_profiled('tracemalloc') + '.tracemalloc'
+        self.assertIsInstance(tracemalloc.Snapshot.load(fpath), tracemalloc.Snapshot)
+
+    def test_disabled(self):
+        with patch.dict(os.environ, {'DH_PYTHON_PROFILE_DIR': self.path}):
+            os.environ.pop('DH_PYTHON_PROFILE', None)
+            with profiled('test'):
+                pass
+        self.assertEqual(os.listdir(self.path), [])
+
+
+class TestPhases(unittest.TestCase):
+    def test_summary(self):
+        phases = Phases()
+        for _ in range(2):
+            with phases('Scan'):
+                pass
+        with phases('DebHelper.save'):
+            pass
+        lines = phases.summary().splitlines()
+        self.assertEqual([line.split()[0] for line in lines], ['Scan', 'DebHelper.save'])
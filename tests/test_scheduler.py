@@ -0,0 +1,186 @@
+from threading import Lock, Thread
+from time import sleep
+import unittest
+
+from dhpython.build.scheduler import (
+    Aborted, MemoryBudget, Scheduler, Sequencer, Stage)
+
+
+class TestScheduler(unittest.TestCase):
+    def test_serial(self):
+        calls = []
+        results = Scheduler(1).run(calls.append, [1, 2, 3])
+        self.assertEqual(calls, [1, 2, 3])
+        self.assertEqual(results, [(1, None), (2, None), (3, None)])
+
+    def test_parallel_results_in_order(self):
+        def func(unit):
+            sleep(0.01 * (3 - unit))
+            if unit == 2:
+                raise ValueError(unit)
+        results = Scheduler(3).run(func, [1, 2, 3])
+        self.assertEqual([unit for unit, _ in results], [1, 2, 3])
+        self.assertIsNone(results[0][1])
+        self.assertIsInstance(results[1][1], ValueError)
+
+    def test_abort(self):
+        scheduler = Scheduler(1)
+
+        def func(unit):
+            scheduler.check()
+            if unit == 1:
+                scheduler.abort()
+                raise ValueError(unit)
+        results = scheduler.run(func, [1, 2])
+        self.assertIsInstance(results[0][1], ValueError)
+        self.assertIsInstance(results[1][1], Aborted)
+
+
+class TestSequencer(unittest.TestCase):
+    def test_order(self):
+        sequencer = Sequencer([1, 2, 3])
+        order = []
+        lock = Lock()
+
+        def func(unit):
+            sleep(0.01 * (3 - unit))
+            with sequencer.turn(unit):
+                with lock:
+                    order.append(unit)
+        Scheduler(3).run(func, [3, 2, 1])
+        self.assertEqual(order, [1, 2, 3])
+
+    def test_done_without_turn(self):
+        sequencer = Sequencer(['a', 'b'])
+        sequencer.done('a')
+        with sequencer.turn('b'):
+            pass
+
+
+class TestStage(unittest.TestCase):
+    def test_overlap(self):
+        stage = Stage([1, 2, 3], limit=1)
+        events = []
+        lock = Lock()
+
+        def func(unit):
+            sleep(0.01 * (3 - unit))
+            with stage.enter(unit):
+                with lock:
+                    events.append(('build', unit))
+                sleep(0.01)
+            # next unit is built while this one is tested
+            sleep(0.05)
+            with lock:
+                events.append(('test', unit))
+        Scheduler(2).run(func, [1, 2, 3])
+        self.assertEqual(events[:3], [('build', 1), ('build', 2), ('test', 1)])
+        self.assertEqual(sorted(events), sorted(
+            (step, unit) for step in ('build', 'test') for unit in (1, 2, 3)))
+
+    def test_limit(self):
+        stage = Stage(range(6), limit=2)
+        running = []
+        peak = []
+        lock = Lock()
+
+        def func(unit):
+            with stage.enter(unit):
+                with lock:
+                    running.append(unit)
+                    peak.append(len(running))
+                sleep(0.01)
+                with lock:
+                    running.remove(unit)
+        Scheduler(6).run(func, range(6))
+        self.assertEqual(max(peak), 2)
+
+
+class FakeJobserver:
+    def __init__(self, tokens):
+        self.tokens = [b'+'] * tokens
+        self.lock = Lock()
+
+    def acquire(self, timeout=None):
+        with self.lock:
+            if self.tokens:
+                return self.tokens.pop()
+        sleep(timeout or 0)
+        return None
+
+    def release(self, *tokens):
+        with self.lock:
+            self.tokens.extend(tokens)
+
+
+class TestJobserverScheduler(unittest.TestCase):
+    def test_limit(self):
+        running = []
+        peak = []
+        lock = Lock()
+
+        def func(unit):
+            with lock:
+                running.append(unit)
+                peak.append(len(running))
+            sleep(0.02)
+            with lock:
+                running.remove(unit)
+        jobserver = FakeJobserver(1)
+        results = Scheduler(4, jobserver).run(func, [1, 2, 3, 4])
+        self.assertEqual([err for _, err in results], [None] * 4)
+        # implicit slot + 1 token
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(jobserver.tokens, [b'+'])
+
+    def test_ordered_slots(self):
+        # units waiting for the previous one in Stage must not take the
+        # slot it needs, even if its thread starts late
+        class LateScheduler(Scheduler):
+            def _call_with_slot(self, func, unit, order, idx):
+                if unit == 1:
+                    sleep(0.1)
+                return super()._call_with_slot(func, unit, order, idx)
+
+        stage = Stage([1, 2, 3], 3)
+        done = []
+
+        def func(unit):
+            with stage.enter(unit):
+                done.append(unit)
+        jobserver = FakeJobserver(1)
+        thread = Thread(target=LateScheduler(3, jobserver).run,
+                        args=(func, [1, 2, 3]), daemon=True)
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(done, [1, 2, 3])
+        self.assertEqual(jobserver.tokens, [b'+'])
+
+
+class TestMemoryBudget(unittest.TestCase):
+    def peak(self, budget, sizes):
+        running = []
+        peak = []
+        lock = Lock()
+
+        def func(size):
+            with budget.reserve(size):
+                with lock:
+                    running.append(size)
+                    peak.append(sum(running))
+                sleep(0.02)
+                with lock:
+                    running.remove(size)
+        results = Scheduler(len(sizes)).run(func, sizes)
+        self.assertEqual([err for _, err in results], [None] * len(sizes))
+        return max(peak)
+
+    def test_limit(self):
+        self.assertEqual(self.peak(MemoryBudget(100), [40, 40, 40, 40]), 80)
+
+    def test_heavy_step_alone(self):
+        self.assertEqual(self.peak(MemoryBudget(100), [150, 10, 150]), 150)
+
+    def test_disabled(self):
+        self.assertEqual(self.peak(MemoryBudget(None), [40, 40, 40]), 120)
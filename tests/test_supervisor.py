@@ -0,0 +1,58 @@
+import os
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+import unittest
+from subprocess import TimeoutExpired
+
+from dhpython.supervisor import run, run_all, split
+
+
+class TestSplit(unittest.TestCase):
+    def test_quoted(self):
+        self.assertEqual(split("ls 'a && b' \"c | d\""), ['ls', 'a && b', 'c | d'])
+
+    def test_shell_features(self):
+        for command in ('ls | wc', 'ls > foo', 'ls; ls', 'ls $HOME',
+                        'echo "`id`"', 'FOO=1 ls', 'cd /', 'ls ~'):
+            with self.subTest(command):
+                self.assertIsNone(split(command))
+
+
+class TestRun(unittest.TestCase):
+    def test_output(self):
+        output = run('echo foo; echo bar >&2; exit 3')
+        self.assertEqual(output, {'returncode': 3, 'stdout': 'foo\n',
+                                  'stderr': 'bar\n'})
+
+    def test_argv(self):
+        output = run(['printf', '%s', 'a b'])
+        self.assertEqual(output['stdout'], 'a b')
+
+    def test_timeout_kills_group(self):
+        with TemporaryDirectory() as tmpdir:
+            pidfile = os.path.join(tmpdir, 'pid')
+            with self.assertRaises(TimeoutExpired):
+                run('sleep 60 & echo $! > {}; wait'.format(pidfile),
+                    timeout=0.5)
+            with open(pidfile, encoding='ascii') as fp:
+                pid = int(fp.read())
+        for _ in range(50):
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                break
+            sleep(0.1)
+        else:
+            self.fail('grandchild is still running')
+
+    def test_concurrent(self):
+        start = monotonic()
+        results = run_all(['sleep 0.5'] * 4, limit=4)
+        self.assertLess(monotonic() - start, 2)
+        self.assertEqual([i['returncode'] for i in results], [0] * 4)
+
+    def test_failure_cancels_others(self):
+        start = monotonic()
+        with self.assertRaises(TimeoutExpired):
+            run_all(['sleep 0.1; sleep 60', ['sleep', '60']], timeout=0.3)
+        self.assertLess(monotonic() - start, 10)
@@ -0,0 +1,111 @@
+import json
+import os
+from os.path import dirname, join
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+import unittest
+
+from dhpython.build.base import has_module
+from dhpython.build.testrunner import assign
+
+RUNNER = join(dirname(dirname(os.path.abspath(__file__))),
+              'dhpython', 'build', 'testrunner.py')
+TEST_MODULE = '''\
+import unittest
+
+class Test(unittest.TestCase):
+    def test_1(self):
+        pass
+
+    def test_2(self):
+        self.assertNotEqual({fail!r}, __name__)
+'''
+
+
+class TestAssign(unittest.TestCase):
+    def test_balanced(self):
+        shards = assign({'a': 4, 'b': 2, 'c': 2, 'd': 1, 'e': 1}, 2)
+        load = [0, 0]
+        for group, count in {'a': 4, 'b': 2, 'c': 2, 'd': 1, 'e': 1}.items():
+            load[shards[group]] += count
+        self.assertEqual(load, [5, 5])
+
+
+class TestRunner(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = self.tempdir.name
+
+    def add_modules(self, names, fail=None):
+        os.makedirs(join(self.path, 'tests'), exist_ok=True)
+        with open(join(self.path, 'tests', '__init__.py'), 'w', encoding='utf-8'):
+            pass
+        for name in names:
+            with open(join(self.path, 'tests', name + '.py'), 'w',
+                      encoding='utf-8') as fp:
+                fp.write(TEST_MODULE.format(fail=fail and 'tests.' + fail))
+
+    def run_tests(self, *args):
+        return subprocess.run(
+            (sys.executable, RUNNER, '--jobs', '3') + args, cwd=self.path,
+            check=False, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            encoding='utf-8')
+
+    def test_unittest(self):
+        self.add_modules(['test_a', 'test_b', 'test_c', 'test_d'])
+        process = self.run_tests('unittest', 'discover', '-v')
+        self.assertEqual(process.returncode, 0, process.stdout)
+        self.assertEqual(process.stdout.count(' ... ok'), 8)
+        self.assertIn('=== shard 3/3 (exit code: 0) ===', process.stdout)
+        self.assertIn('all 3 shards passed', process.stdout)
+
+    def test_unittest_failure(self):
+        self.add_modules(['test_a', 'test_b', 'test_c'], fail='test_b')
+        process = self.run_tests('unittest', 'discover', '-v')
+        self.assertEqual(process.returncode, 1, process.stdout)
+        self.assertEqual(process.stdout.count(' ... FAIL'), 1)
+        self.assertEqual(process.stdout.count(' ... ok'), 5)
+
+    def test_no_tests(self):
+        process = self.run_tests('unittest', 'discover')
+        self.assertEqual(process.returncode, 5, process.stdout)
+
+    def test_pytest(self):
+        try:
+            import pytest  # pylint: disable=import-outside-toplevel,unused-import
+        except ImportError:
+            self.skipTest('pytest is not available')
+        self.add_modules(['test_a', 'test_b'], fail='test_a')
+        process = self.run_tests('pytest', '-p', 'no:xdist', '-p', 'no:cacheprovider')
+        self.assertEqual(process.returncode, 1, process.stdout)
+        self.assertIn('1 failed, 1 passed', process.stdout)
+        self.assertIn('2 passed', process.stdout)
+
+    def test_pytest_lastfailed(self):
+        try:
+            import pytest  # pylint: disable=import-outside-toplevel,unused-import
+        except ImportError:
+            self.skipTest('pytest is not available')
+        self.add_modules(['test_a', 'test_b', 'test_c'], fail='test_b')
+        self.run_tests('pytest', '-p', 'no:xdist')
+        with open(join(self.path, '.pytest_cache', 'v', 'cache', 'lastfailed'),
+                  encoding='utf-8') as fp:
+            self.assertEqual(list(json.load(fp)), ['tests/test_b.py::Test::test_2'])
+        # failed tests are run first and --exitfirst skips the rest
+        process = self.run_tests('pytest', '-p', 'no:xdist', '--ff', '-x', '-v')
+        self.assertEqual(process.returncode, 1, process.stdout)
+        self.assertIn('1 failed', process.stdout)
+
+
+class TestHasModule(unittest.TestCase):
+    def test_target_interpreter(self):
+        self.assertTrue(has_module(sys.executable, 'json'))
+        self.assertFalse(has_module(sys.executable, 'no_such_module'))
+        # f.e. pytest-xdist installed only for pybuild's own interpreter
+        with TemporaryDirectory() as tmpdir:
+            with open(join(tmpdir, 'interpreter'), 'w', encoding='utf-8') as fp:
+                fp.write('#!/bin/sh\nexit 1\n')
+            os.chmod(fp.name, 0o755)
+            self.assertFalse(has_module(fp.name, 'json'))
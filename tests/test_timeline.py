@@ -0,0 +1,69 @@
+import json
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+from dhpython.build.timeline import Timeline
+
+
+class TestTimeline(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = self.tempdir.name
+        self.timeline = Timeline(join(self.path, '.pybuild', 'timeline.jsonl'))
+
+    def test_events(self):
+        step = self.timeline.step('build', 'python3.12', '3.12', 'pyproject')
+        with step.record():
+            with step.command('python3.12 -m build') as result:
+                result.update(returncode=0, resources={'utime': 1.5, 'maxrss': 2048})
+            with step.command('python3.12 -m installer') as result:
+                result.update(returncode=0, resources={'utime': 0.5, 'maxrss': 1024})
+        command, _, step = self.timeline.events()
+        self.assertEqual(command['event'], 'command')
+        self.assertEqual(command['command'], 'python3.12 -m build')
+        self.assertEqual(command['returncode'], 0)
+        self.assertEqual(step['event'], 'step')
+        self.assertEqual((step['step'], step['interpreter'], step['version'],
+                          step['plugin']), ('build', 'python3.12', '3.12', 'pyproject'))
+        self.assertLessEqual(step['start'], command['start'])
+        self.assertGreaterEqual(step['end'], command['end'])
+        self.assertEqual(command['maxrss'], 2048)
+        self.assertEqual(step['utime'], 2.0)
+        self.assertEqual(step['maxrss'], 2048)
+
+    def test_stats(self):
+        for version in ('3.12', '3.13'):
+            for name in ('build', 'install'):
+                step = self.timeline.step(name, 'python' + version, version, 'distutils')
+                with step.record():
+                    with step.command('true') as result:
+                        result['resources'] = {'utime': 1.0, 'maxrss': 1024 * 100}
+        lines = self.timeline.stats().splitlines()
+        self.assertEqual(len(lines), 8)  # header, 2x (2 steps + total), total
+        self.assertEqual(lines[3].split()[:4], ['python3.12', 'total', '0.0', '2.0'])
+        self.assertEqual(lines[-1].split()[:4], ['all', 'total', '0.0', '4.0'])
+        self.assertEqual(lines[-1].split()[5], '100')
+
+    def test_failed_step(self):
+        step = self.timeline.step('test', 'python3.12', '3.12', 'distutils')
+        with self.assertRaises(ValueError):
+            with step.record():
+                raise ValueError()
+        self.assertEqual(self.timeline.events()[0]['returncode'], 1)
+
+    def test_export_chrome(self):
+        for version in ('3.12', '3.13'):
+            step = self.timeline.step('build', 'python' + version, version, 'distutils')
+            with step.record():
+                pass
+        fpath = join(self.path, 'trace.json')
+        self.timeline.export_chrome(fpath)
+        with open(fpath, encoding='utf-8') as fp:
+            trace = json.load(fp)['traceEvents']
+        spans = [i for i in trace if i['ph'] == 'X']
+        self.assertEqual(len(spans), 2)
+        self.assertEqual({i['tid'] for i in spans}, {1, 2})
+        rows = {i['args']['name'] for i in trace if i['name'] == 'thread_name'}
+        self.assertEqual(rows, {'python3.12', 'python3.13'})
@@ -3,7 +3,8 @@ from tempfile import TemporaryDirectory, NamedTemporaryFile
 import os
 import unittest
 
-from dhpython.tools import fix_shebang, relpath, move_matching_files
+from dhpython.tools import (
+    execute, fix_shebang, move_matching_files, read_log, relpath)
 
 
 class TestRelpath(unittest.TestCase):
@@ -111,3 +112,34 @@ class TestFixShebang(unittest.TestCase):
         self.write_shebang("#!/usr/bin/env python")
         fix_shebang(self.tmpfile, "/usr/bin/foo")
         self.assert_shebang("#! /usr/bin/foo")
+
+
+class TestExecute(unittest.TestCase):
+    def test_output(self):
+        output = execute('echo foo; echo bar >&2; exit 3')
+        self.assertEqual(output['returncode'], 3)
+        self.assertEqual(output['stdout'], 'foo\n')
+        self.assertEqual(output['stderr'], 'bar\n')
+
+    def test_resources(self):
+        # 64 MiB allocated in a grandchild
+        output = execute('python3 -c "x = bytearray(64 * 1024 * 1024)"; true')
+        resources = output['resources']
+        self.assertGreaterEqual(resources['maxrss'], 64 * 1024)
+        self.assertGreater(resources['utime'] + resources['stime'], 0)
+
+    def test_compressed_log(self):
+        with TemporaryDirectory() as tmpdir:
+            fpath = os.path.join(tmpdir, 'build_cmd.log.gz')
+            execute('echo foo', log_output=fpath)
+            offset = os.path.getsize(fpath)
+            output = execute('seq 10000; echo bar >&2; false',
+                             log_output=fpath)
+            self.assertEqual(output['returncode'], 1)
+            self.assertTrue(output['tail'].endswith('9999\n10000\nbar\n'))
+            self.assertLessEqual(len(output['tail']), 8192)
+            self.assertIn('foo\n', read_log(fpath))
+            log = read_log(fpath, offset)
+            self.assertNotIn('foo\n', log)
+            self.assertIn('$ seq 10000', log)
+            self.assertTrue(log.endswith('10000\nbar\n'))
@@ -0,0 +1,77 @@
+from argparse import Namespace
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+import os
+import shlex
+import unittest
+
+from dhpython.build.base import tox_workdir
+from dhpython.build.plugin_custom import BuildSystem
+from dhpython.interpreter import Interpreter
+from dhpython.version import Version
+
+
+class TestToxWorkdir(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmpdir.cleanup)
+        self.config = os.path.join(self.tmpdir.name, 'tox.ini')
+        self.write('[tox]\n')
+
+    def write(self, content):
+        with open(self.config, 'w', encoding='utf-8') as fp:
+            fp.write(content)
+
+    @staticmethod
+    def args(interpreter='python3.12', home_dir='.pybuild/cpython3_3.12',
+             autopkgtest=False):
+        return {'interpreter': interpreter, 'home_dir': home_dir,
+                'autopkgtest': autopkgtest}
+
+    def test_reused(self):
+        workdir = tox_workdir(self.args(), self.config)
+        self.assertTrue(workdir.startswith('.pybuild/tox/python3.12-'))
+        self.assertEqual(workdir, tox_workdir(self.args(), self.config))
+
+    def test_interpreter(self):
+        self.assertNotEqual(tox_workdir(self.args(), self.config),
+                            tox_workdir(self.args('python3.13'), self.config))
+
+    def test_changed_config(self):
+        workdir = tox_workdir(self.args(), self.config)
+        self.write('[tox]\nenvlist = py3\n')
+        self.assertNotEqual(workdir, tox_workdir(self.args(), self.config))
+
+    def test_autopkgtest(self):
+        # home_dir is $AUTOPKGTEST_TMP itself
+        args = self.args(home_dir='/tmp/autopkgtest.XYZ/autopkgtest_tmp',
+                         autopkgtest=True)
+        self.assertTrue(tox_workdir(args, self.config).startswith(
+            '/tmp/autopkgtest.XYZ/autopkgtest_tmp/tox/python3.12-'))
+
+
+class TestToxCommand(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmpdir.cleanup)
+        # a path that needs quoting in shell commands
+        self.path = os.path.join(self.tmpdir.name, "a b;'c")
+        os.makedirs(os.path.join(self.path, 'build'))
+        with open(os.path.join(self.path, 'tox.ini'), 'w', encoding='utf-8') as fp:
+            fp.write('[tox]\n')
+
+    def test_quoted_workdir(self):
+        plugin = BuildSystem(Namespace(
+            test_jobs=1, test_fail_fast=False, test_nose2=False, test_nose=False,
+            test_pytest=False, test_tox=True, quiet=False, really_quiet=False))
+        args = {'dir': self.path, 'home_dir': self.path, 'args': '',
+                'build_dir': os.path.join(self.path, 'build'), 'autopkgtest': True,
+                'interpreter': Interpreter('python3.12'), 'version': Version('3.12')}
+        with patch('dhpython.build.base.tox_major_version', return_value=4), \
+                patch.object(BuildSystem, 'execute',
+                             return_value={'returncode': 0}) as execute:
+            plugin.test({'ENV': {}}, args)
+        command = shlex.split(execute.call_args.args[2])
+        workdir = command[command.index('--workdir') + 1]
+        self.assertEqual(workdir, args['tox_work_dir'])
+        self.assertTrue(workdir.startswith(os.path.join(self.path, 'tox', 'python3.12-')))
@@ -0,0 +1,42 @@
+from tempfile import TemporaryDirectory
+import os
+import unittest
+
+from dhpython.build.trash import Trash
+
+
+class TestTrash(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmpdir.cleanup)
+        self.trash_dir = os.path.join(self.tmpdir.name, '.pybuild', 'trash')
+        self.trash = Trash(self.trash_dir)
+
+    def make_dir(self, name, files=10):
+        dpath = os.path.join(self.tmpdir.name, name)
+        os.makedirs(os.path.join(dpath, 'sub'))
+        for i in range(files):
+            with open(os.path.join(dpath, 'sub', str(i)), 'w', encoding='utf-8'):
+                pass
+        return dpath
+
+    def test_discard(self):
+        paths = [self.make_dir(name) for name in ('build', 'other')]
+        for path in paths:
+            self.trash.discard(path)
+            # directory is gone (moved) before discard returns
+            self.assertFalse(os.path.exists(path))
+        self.trash.wait()
+        self.assertEqual(os.listdir(self.trash_dir), [])
+
+    def test_leftovers(self):
+        # directories moved to trash by an interrupted invocation
+        os.makedirs(os.path.join(self.trash_dir, 'old', 'sub'))
+        self.trash.discard(self.make_dir('build'))
+        self.trash.wait()
+        self.assertEqual(os.listdir(self.trash_dir), [])
+
+    def test_missing(self):
+        self.trash.discard(os.path.join(self.tmpdir.name, 'missing'))
+        self.trash.wait()
+        self.assertFalse(os.path.exists(self.trash_dir))
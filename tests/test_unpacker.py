@@ -0,0 +1,74 @@
+import os
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+
+from dhpython.build.unpacker import PARALLEL_THRESHOLD, is_stored, unpack_wheel
+
+try:
+    import installer
+except ImportError:
+    installer = None
+
+
+@unittest.skipIf(installer is None, 'installer module is not available')
+class TestUnpackWheel(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tempdir.cleanup)
+        self.path = self.tempdir.name
+        self.wheel = join(self.path, 'foo-1.0-py3-none-any.whl')
+        with ZipFile(self.wheel, 'w', ZIP_DEFLATED) as zfile:
+            for i in range(PARALLEL_THRESHOLD):
+                zfile.writestr('foo/mod{}.py'.format(i), 'x = {}\n'.format(i))
+            zfile.writestr('foo-1.0.dist-info/WHEEL',
+                           'Wheel-Version: 1.0\nRoot-Is-Purelib: true\n')
+            zfile.writestr('foo-1.0.dist-info/entry_points.txt',
+                           '[console_scripts]\nfoo = foo.cli:main\n')
+            zfile.writestr('foo-1.0.dist-info/RECORD', '')
+            zfile.writestr('foo-1.0.data/scripts/bar', '#!python\nprint(1)\n')
+            zfile.writestr('foo-1.0.data/data/share/doc/foo/README', 'doc')
+        self.scheme = {
+            'purelib': join(self.path, 'lib'),
+            'platlib': join(self.path, 'lib'),
+            'scripts': join(self.path, 'bin'),
+            'data': join(self.path, 'data'),
+        }
+
+    def test_unpack(self):
+        unpack_wheel(self.wheel, self.scheme, '/usr/bin/python3')
+        lib = self.scheme['purelib']
+        with open(join(lib, 'foo', 'mod7.py'), encoding='utf-8') as fp:
+            self.assertEqual(fp.read(), 'x = 7\n')
+        self.assertFalse(os.path.exists(join(lib, 'foo-1.0.dist-info', 'RECORD')))
+        self.assertTrue(os.path.exists(
+            join(self.scheme['data'], 'share', 'doc', 'foo', 'README')))
+
+    def test_scripts(self):
+        unpack_wheel(self.wheel, self.scheme, '/usr/bin/python3', jobs=1)
+        bar = join(self.scheme['scripts'], 'bar')
+        with open(bar, encoding='utf-8') as fp:
+            self.assertEqual(fp.read(), '#!/usr/bin/python3\nprint(1)\n')
+        self.assertTrue(os.access(bar, os.X_OK))
+        with open(join(self.scheme['scripts'], 'foo'), encoding='utf-8') as fp:
+            self.assertEqual(fp.readline(), '#!/usr/bin/python3\n')
+
+    def test_only(self):
+        unpack_wheel(self.wheel, self.scheme, '/usr/bin/python3',
+                     only={'scripts'})
+        self.assertEqual(sorted(os.listdir(self.scheme['scripts'])), ['bar', 'foo'])
+        self.assertFalse(os.path.exists(self.scheme['purelib']))
+
+    def test_is_stored(self):
+        self.assertFalse(is_stored(self.wheel))
+        stored = join(self.path, 'bar-1.0-py3-none-any.whl')
+        with ZipFile(stored, 'w', ZIP_STORED) as zfile:
+            zfile.writestr('bar.py', '')
+        self.assertTrue(is_stored(stored))
+
+    def test_invalid_path(self):
+        with ZipFile(self.wheel, 'a') as zfile:
+            zfile.writestr('../evil', '')
+        with self.assertRaises(Exception):
+            unpack_wheel(self.wheel, self.scheme, '/usr/bin/python3')
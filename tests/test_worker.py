@@ -0,0 +1,67 @@
+import os
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+from dhpython.build import worker
+
+
+class TestWorker(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tempdir.cleanup)
+        self.addCleanup(worker.stop_all)
+        self.path = self.tempdir.name
+        with open(join(self.path, 'setup.py'), 'w', encoding='utf-8') as fp:
+            fp.write('import os, sys\n'
+                     'print(sys.argv[1:], os.getcwd(), os.environ["FOO"])\n'
+                     'sys.exit(int(os.environ.get("RC", 0)))\n')
+        self.env = dict(os.environ, FOO='bar')
+
+    def test_execute(self):
+        output = worker.execute('python3 setup.py build', self.path, self.env)
+        self.assertEqual(output['returncode'], 0)
+        self.assertEqual(output['stdout'],
+                         "['build'] {} bar\n".format(os.path.realpath(self.path)))
+
+    def test_returncode(self):
+        self.env['RC'] = '3'
+        output = worker.execute('python3 setup.py build', self.path, self.env)
+        self.assertEqual(output['returncode'], 3)
+
+    def test_exception(self):
+        output = worker.execute('python3 -c "raise ValueError(42)"', self.path, self.env)
+        self.assertEqual(output['returncode'], 1)
+        self.assertIn('ValueError: 42', output['stderr'])
+
+    def test_log_file(self):
+        log_file = join(self.path, 'build_cmd.log')
+        worker.execute('python3 setup.py build', self.path, self.env, log_file)
+        with open(log_file, encoding='utf-8') as fp:
+            content = fp.read()
+        self.assertIn('$ python3 setup.py build\n', content)
+        self.assertIn("['build']", content)
+
+    def test_resources(self):
+        output = worker.execute('python3 -c "x = bytearray(1 << 26)"',
+                                self.path, self.env)
+        self.assertEqual(output['returncode'], 0)
+        self.assertGreater(output['resources']['maxrss'], 64 * 1024)
+        self.assertIn('utime', output['resources'])
+
+    def test_pass_fds(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        # f.e. make's jobserver, referred to by its number in MAKEFLAGS
+        try:
+            output = worker.execute(
+                'python3 -c "import os; os.write({}, b\'+\')"'.format(write_fd),
+                self.path, self.env, pass_fds=(write_fd,))
+        finally:
+            os.close(write_fd)
+        self.assertEqual(output['returncode'], 0, output['stderr'])
+        self.assertEqual(os.read(read_fd, 1), b'+')
+
+    def test_shell_needed(self):
+        self.assertIsNone(worker.execute('cd /; python3 setup.py', self.path, self.env))
+        self.assertIsNone(worker.execute('make build', self.path, self.env))